@@ -1,7 +1,7 @@
 # Backend AI modules package
 from .business_parser import parse_business_description, BusinessProfile
 from .layout_selector import select_layout, LayoutBlueprint
-from .speech_to_text import transcribe_audio, TranscriptionResult, is_supported_format
+from .speech_to_text import transcribe_audio, transcribe_audio_sync, TranscriptionResult, is_supported_format
 from .language_normalizer import normalize_text, NormalizedText, extract_business_keywords
 from .content_extractor import (
     extract_business_info,
@@ -15,6 +15,7 @@ __all__ = [
     "select_layout",
     "LayoutBlueprint",
     "transcribe_audio",
+    "transcribe_audio_sync",
     "TranscriptionResult",
     "is_supported_format",
     "normalize_text",
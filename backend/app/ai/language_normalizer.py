@@ -1,11 +1,21 @@
 """
 Language Normalizer Module
 Cleans and normalizes transcribed text, especially for Hinglish (Hindi-English mix).
+
+This module is kept mypyc-compatible: the Docker images compile it to a C
+extension (see Dockerfile.api), which is picked up in place of this file.
 """
 
 import re
+import string
+import threading
 from typing import Optional
-from pydantic import BaseModel
+from pydantic.main import BaseModel  # Defining module: mypyc needs it for the subclass below
+
+try:
+    import hyperscan
+except ImportError:  # Optional: fall back to the stdlib regex scanner
+    hyperscan = None  # type: ignore[assignment]
 
 
 class NormalizedText(BaseModel):
@@ -47,6 +57,104 @@ TRANSCRIPTION_ARTIFACTS = [
     r'\.{3,}',   # Replace multiple dots with single
 ]
 
+# Precompiled patterns (compiled once at import, reused per call)
+_ARTIFACTS_RE = re.compile(
+    "|".join(f"(?:{p})" for p in TRANSCRIPTION_ARTIFACTS),
+    re.IGNORECASE
+)
+_WS_RE = re.compile(r'\s+')
+_CAP_RE = re.compile(r'(^|[.!?]+\s*)([a-zA-Z\u0900-\u097F])')
+_REPEAT_PUNCT_RE = re.compile(r'([.!?])\1+')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([.!?,])')
+# Language detection counts characters with C-level str/bytes methods:
+# ASCII letters via a deletion table, Devanagari (U+0900-U+097F) via its
+# UTF-8 lead bytes E0 A4 / E0 A5
+_ASCII_LETTERS_DELETE = str.maketrans('', '', string.ascii_letters)
+_DEVANAGARI_UTF8_PREFIXES = (b'\xe0\xa4', b'\xe0\xa5')
+# Longest-first so "dukaan" is tried before its prefix "dukan"
+_HINGLISH_RE = re.compile(
+    r'\b(' + '|'.join(
+        re.escape(k) for k in sorted(HINGLISH_NORMALIZATIONS, key=len, reverse=True)
+    ) + r')\b',
+    re.IGNORECASE
+)
+
+# Common business type keywords
+BUSINESS_KEYWORDS = [
+    "clinic", "hospital", "doctor", "medical",
+    "shop", "store", "dukan", "retail",
+    "restaurant", "cafe", "food", "khana",
+    "salon", "parlour", "beauty",
+    "tuition", "coaching", "school", "education",
+    "gym", "fitness", "yoga",
+    "hotel", "lodge", "guest house",
+    "pharmacy", "medical store", "dawai",
+    "repair", "service", "mechanic",
+    "bakery", "sweet shop", "mithai",
+    "hardware", "electrician", "plumber",
+    "lawyer", "advocate", "legal",
+    "accountant", "CA", "tax",
+    "photography", "studio", "video",
+]
+
+# Keywords are matched against lowercased text, so only lowercase entries
+# can ever match. Longest-first so a lookahead hit reports the widest keyword.
+_MATCHABLE_KEYWORDS = sorted(
+    {k for k in BUSINESS_KEYWORDS if k == k.lower()},
+    key=len,
+    reverse=True
+)
+_BUSINESS_KEYWORDS_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, _MATCHABLE_KEYWORDS)) + "))"
+)
+_BUSINESS_KEYWORD_SUBSTRINGS = {
+    keyword: [k for k in _MATCHABLE_KEYWORDS if k in keyword]
+    for keyword in _MATCHABLE_KEYWORDS
+}
+
+
+def _build_keyword_database():
+    """Compile the business keywords into a Hyperscan block-mode database."""
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[re.escape(k).encode() for k in _MATCHABLE_KEYWORDS],
+            ids=list(range(len(_MATCHABLE_KEYWORDS))),
+            elements=len(_MATCHABLE_KEYWORDS),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(_MATCHABLE_KEYWORDS),
+        )
+        return db
+    except Exception:
+        # Unsupported CPU/platform: keep the regex path
+        return None
+
+
+_KEYWORD_DB = _build_keyword_database()
+_hs_local = threading.local()
+
+
+def _scan_keywords_hyperscan(text_lower: str) -> set[str]:
+    """Collect every keyword occurring in text_lower with one Hyperscan pass."""
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        # Scratch space is not thread-safe; allocate one per thread
+        scratch = hyperscan.Scratch(_KEYWORD_DB)
+        _hs_local.scratch = scratch
+    
+    ids = set()
+    
+    def on_match(id, start, end, flags, context):
+        ids.add(id)
+    
+    _KEYWORD_DB.scan(
+        text_lower.encode("utf-8"),
+        match_event_handler=on_match,
+        scratch=scratch,
+    )
+    return {_MATCHABLE_KEYWORDS[i] for i in ids}
+
 
 def normalize_text(
     text: str,
@@ -72,29 +180,30 @@ def normalize_text(
     normalized = text.strip()
     original = text
     
-    # Step 1: Remove transcription artifacts
-    for pattern in TRANSCRIPTION_ARTIFACTS:
-        cleaned = re.sub(pattern, '', normalized, flags=re.IGNORECASE)
-        if cleaned != normalized:
-            modifications.append(f"Removed artifact pattern: {pattern}")
-            normalized = cleaned
+    # Step 1: Remove transcription artifacts (single pass over combined pattern)
+    cleaned = _ARTIFACTS_RE.sub('', normalized)
+    if len(cleaned) != len(normalized):
+        modifications.append("Removed transcription artifacts")
+        normalized = cleaned
     
     # Step 2: Normalize whitespace
-    normalized_ws = re.sub(r'\s+', ' ', normalized).strip()
+    normalized_ws = _WS_RE.sub(' ', normalized).strip()
     if normalized_ws != normalized:
         modifications.append("Normalized whitespace")
         normalized = normalized_ws
     
+    # Step 2b: Normalize Hinglish terms (single pass over combined pattern)
+    normalized_hi = _HINGLISH_RE.sub(
+        lambda m: HINGLISH_NORMALIZATIONS[m.group(1).lower()], normalized
+    )
+    if normalized_hi != normalized:
+        modifications.append("Normalized Hinglish terms")
+        normalized = normalized_hi
+    
     # Step 3: Capitalize first letter of sentences
-    sentences = re.split(r'([.!?]+)', normalized)
-    capitalized = []
-    for i, part in enumerate(sentences):
-        if i % 2 == 0 and part:  # Sentence content
-            part = part.strip()
-            if part:
-                part = part[0].upper() + part[1:] if len(part) > 1 else part.upper()
-        capitalized.append(part)
-    normalized_cap = ''.join(capitalized)
+    normalized_cap = _CAP_RE.sub(
+        lambda m: m.group(1) + m.group(2).upper(), normalized
+    )
     if normalized_cap != normalized:
         modifications.append("Capitalized sentences")
         normalized = normalized_cap
@@ -106,15 +215,17 @@ def normalize_text(
         modifications.append("Added ending punctuation")
     
     # Step 5: Clean up repeated punctuation
-    normalized = re.sub(r'([.!?])\1+', r'\1', normalized)
-    normalized = re.sub(r'\s+([.!?,])', r'\1', normalized)
+    normalized = _REPEAT_PUNCT_RE.sub(r'\1', normalized)
+    normalized = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', normalized)
     
     # Detect language if auto
     detected_language = source_language
     if source_language == "auto":
         # Simple detection: check for Hindi characters
-        hindi_chars = len(re.findall(r'[\u0900-\u097F]', normalized))
-        total_chars = len(re.findall(r'[a-zA-Z\u0900-\u097F]', normalized))
+        encoded = normalized.encode('utf-8')
+        hindi_chars = sum(encoded.count(prefix) for prefix in _DEVANAGARI_UTF8_PREFIXES)
+        ascii_letters = len(normalized) - len(normalized.translate(_ASCII_LETTERS_DELETE))
+        total_chars = hindi_chars + ascii_letters
         if total_chars > 0:
             hindi_ratio = hindi_chars / total_chars
             detected_language = "hi" if hindi_ratio > 0.3 else "en"
@@ -134,28 +245,14 @@ def extract_business_keywords(text: str) -> list[str]:
     Extract potential business-related keywords from text.
     Useful for improving layout selection.
     """
-    # Common business type keywords
-    business_keywords = [
-        "clinic", "hospital", "doctor", "medical",
-        "shop", "store", "dukan", "retail",
-        "restaurant", "cafe", "food", "khana",
-        "salon", "parlour", "beauty",
-        "tuition", "coaching", "school", "education",
-        "gym", "fitness", "yoga",
-        "hotel", "lodge", "guest house",
-        "pharmacy", "medical store", "dawai",
-        "repair", "service", "mechanic",
-        "bakery", "sweet shop", "mithai",
-        "hardware", "electrician", "plumber",
-        "lawyer", "advocate", "legal",
-        "accountant", "CA", "tax",
-        "photography", "studio", "video",
-    ]
-    
     text_lower = text.lower()
-    found = []
-    for keyword in business_keywords:
-        if keyword in text_lower:
-            found.append(keyword)
+    if _KEYWORD_DB is not None:
+        hits = _scan_keywords_hyperscan(text_lower)
+    else:
+        # Single scan for every keyword start position, then expand to the
+        # keywords nested inside each hit (e.g. "medical store" -> "medical")
+        hits = set()
+        for match in _BUSINESS_KEYWORDS_RE.finditer(text_lower):
+            hits.update(_BUSINESS_KEYWORD_SUBSTRINGS[match.group(1)])
     
-    return found
+    return [keyword for keyword in BUSINESS_KEYWORDS if keyword in hits]
@@ -4,10 +4,35 @@ Converts audio to text using OpenAI Whisper API.
 Supports English and Hindi for regional language adoption.
 """
 
-import io
-from typing import Optional
+from functools import lru_cache
+from typing import IO, Optional
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+
+# Supported audio MIME types, in display order
+SUPPORTED_AUDIO_FORMATS_ORDERED: tuple[str, ...] = (
+    "audio/webm",
+    "audio/mp4",
+    "audio/m4a",
+    "audio/wav",
+    "audio/wave",
+    "audio/x-wav",
+    "audio/mp3",
+    "audio/mpeg",
+    "video/webm",  # Some browsers record as video/webm
+)
+
+# Same formats as a frozenset for O(1) membership checks
+SUPPORTED_AUDIO_FORMATS: frozenset[str] = frozenset(SUPPORTED_AUDIO_FORMATS_ORDERED)
+
+# Map our language codes to Whisper language codes
+WHISPER_LANGUAGE_MAP = {
+    "en": "en",
+    "hi": "hi",
+    "english": "en",
+    "hindi": "hi"
+}
 
 
 class TranscriptionResult(BaseModel):
@@ -17,8 +42,52 @@ class TranscriptionResult(BaseModel):
     duration_seconds: Optional[float] = None
 
 
-def transcribe_audio(
-    audio_data: bytes,
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> OpenAI:
+    """Shared OpenAI client per API key (reuses its connection pool)."""
+    return OpenAI(api_key=api_key)
+
+
+@lru_cache(maxsize=4)
+def _get_async_client(api_key: str) -> AsyncOpenAI:
+    """Shared AsyncOpenAI client per API key (reuses its connection pool)."""
+    return AsyncOpenAI(api_key=api_key)
+
+
+def _build_transcription_params(
+    audio_stream: IO[bytes],
+    filename: str,
+    language: Optional[str]
+) -> dict:
+    """Build Whisper request parameters (file is streamed, not buffered)."""
+    params = {
+        "model": "whisper-1",
+        "file": (filename, audio_stream),
+        "response_format": "verbose_json"
+    }
+    
+    # Add language hint if provided
+    if language:
+        params["language"] = WHISPER_LANGUAGE_MAP.get(language.lower(), language)
+    
+    return params
+
+
+def _to_transcription_result(response, language: Optional[str]) -> TranscriptionResult:
+    """Extract results from a Whisper verbose_json response."""
+    transcribed_text = response.text.strip()
+    detected_language = getattr(response, 'language', language or 'en')
+    duration = getattr(response, 'duration', None)
+    
+    return TranscriptionResult(
+        text=transcribed_text,
+        language=detected_language,
+        duration_seconds=duration
+    )
+
+
+async def transcribe_audio(
+    audio_stream: IO[bytes],
     filename: str,
     language: Optional[str] = None,
     api_key: str = ""
@@ -27,7 +96,8 @@ def transcribe_audio(
     Transcribe audio to text using OpenAI Whisper API.
     
     Args:
-        audio_data: Raw audio bytes
+        audio_stream: Readable binary file-like object (streamed to the API,
+            e.g. an UploadFile's underlying file)
         filename: Original filename (for format detection)
         language: Optional language hint ('en' for English, 'hi' for Hindi)
         api_key: OpenAI API key
@@ -41,58 +111,36 @@ def transcribe_audio(
         - WAV (fallback)
         - MP3
     """
-    client = OpenAI(api_key=api_key)
-    
-    # Prepare audio file for API
-    audio_file = io.BytesIO(audio_data)
-    audio_file.name = filename
+    client = _get_async_client(api_key)
+    params = _build_transcription_params(audio_stream, filename, language)
     
-    # Build transcription parameters
-    params = {
-        "model": "whisper-1",
-        "file": audio_file,
-        "response_format": "verbose_json"
-    }
+    # Call Whisper API without blocking the event loop
+    response = await client.audio.transcriptions.create(**params)
     
-    # Add language hint if provided
-    if language:
-        # Map our language codes to Whisper language codes
-        language_map = {
-            "en": "en",
-            "hi": "hi",
-            "english": "en",
-            "hindi": "hi"
-        }
-        params["language"] = language_map.get(language.lower(), language)
+    return _to_transcription_result(response, language)
+
+
+def transcribe_audio_sync(
+    audio_stream: IO[bytes],
+    filename: str,
+    language: Optional[str] = None,
+    api_key: str = ""
+) -> TranscriptionResult:
+    """
+    Synchronous version of transcribe_audio for use in Celery tasks.
+    """
+    client = _get_client(api_key)
+    params = _build_transcription_params(audio_stream, filename, language)
     
     # Call Whisper API
     response = client.audio.transcriptions.create(**params)
     
-    # Extract results
-    transcribed_text = response.text.strip()
-    detected_language = getattr(response, 'language', language or 'en')
-    duration = getattr(response, 'duration', None)
-    
-    return TranscriptionResult(
-        text=transcribed_text,
-        language=detected_language,
-        duration_seconds=duration
-    )
+    return _to_transcription_result(response, language)
 
 
 def get_supported_formats() -> list[str]:
     """Return list of supported audio formats."""
-    return [
-        "audio/webm",
-        "audio/mp4",
-        "audio/m4a",
-        "audio/wav",
-        "audio/wave",
-        "audio/x-wav",
-        "audio/mp3",
-        "audio/mpeg",
-        "video/webm",  # Some browsers record as video/webm
-    ]
+    return list(SUPPORTED_AUDIO_FORMATS_ORDERED)
 
 
 def is_supported_format(content_type: str) -> bool:
@@ -101,5 +149,5 @@ def is_supported_format(content_type: str) -> bool:
     Handles content types with codec parameters, e.g., 'audio/webm;codecs=opus'
     """
     # Extract base MIME type (before any semicolon)
-    base_type = content_type.lower().split(';')[0].strip()
-    return base_type in get_supported_formats()
+    base_type = content_type.lower().split(';', 1)[0].strip()
+    return base_type in SUPPORTED_AUDIO_FORMATS
@@ -237,14 +237,14 @@ async def quick_edit(
     Quick edit a single field without AI processing.
     Requires authentication and ownership verification.
     """
-    from app.services import supabase_service
+    from app.services import get_supabase_service
     from app.core.config import get_settings
     
     settings = get_settings()
     
     # SECURITY: Verify ownership in production
     if settings.is_production:
-        website = await supabase_service.get_website(website_id, user.id)
+        website = await get_supabase_service().get_website(website_id, user.id)
         if not website:
             raise HTTPException(status_code=404, detail="Website not found or access denied")
     
@@ -302,7 +302,7 @@ async def update_theme(
     Requires authentication and ownership verification.
     """
     from app.services.theme_service import get_theme
-    from app.services import supabase_service
+    from app.services import get_supabase_service
     
     settings = get_settings()
     
@@ -312,7 +312,7 @@ async def update_theme(
         website = None
         
         if settings.is_production:
-            website = await supabase_service.get_website(website_id, owner_id=user.id)
+            website = await get_supabase_service().get_website(website_id, owner_id=user.id, include_html=False)
             if not website:
                 raise HTTPException(status_code=404, detail="Website not found or access denied")
         else:
@@ -361,7 +361,7 @@ async def update_theme(
         # Update storage
         if settings.is_production:
             # Update via Supabase
-            await supabase_service.update_website_html(
+            await get_supabase_service().update_website_html(
                 website_id=website_id,
                 owner_id=user.id,  # SECURITY: Verify ownership
                 html=html,
@@ -407,16 +407,16 @@ async def save_html(
     Uses Supabase to persist the changes.
     Requires authentication and ownership verification.
     """
-    from app.services import supabase_service
+    from app.services import get_supabase_service
     
     try:
         # Check if website exists and user owns it
-        website = await supabase_service.get_website(website_id, owner_id=user.id)
+        website = await get_supabase_service().get_website(website_id, owner_id=user.id, include_html=False)
         if not website:
             raise HTTPException(status_code=404, detail="Website not found or access denied")
         
         # Update HTML using Supabase service
-        result = await supabase_service.update_website_html(
+        result = await get_supabase_service().update_website_html(
             website_id=website_id,
             owner_id=user.id,  # SECURITY: Verify ownership
             html=request.html,
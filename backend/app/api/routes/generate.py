@@ -140,7 +140,7 @@ async def generate_website(
     - x-market: IN → Simpler hero, WhatsApp forced on, high-contrast theme
     - x-market: GLOBAL → Brand voice enabled, modern-glass theme
     """
-    from app.services.supabase import supabase_service
+    from app.services.supabase import get_supabase_service
     
     settings = get_settings()
     
@@ -156,7 +156,7 @@ async def generate_website(
     
     # In production mode, check and deduct credits
     if settings.is_production:
-        has_credits = await supabase_service.check_credits(user.user_id, "generate")
+        has_credits = await get_supabase_service().check_credits(user.user_id, "generate")
         if not has_credits:
             raise HTTPException(
                 status_code=402,
@@ -214,7 +214,7 @@ async def generate_website(
         if settings.is_production:
             try:
                 print(f"[Architect] Saving website to Supabase for user {user.user_id}")
-                website_record = await supabase_service.create_website(
+                website_record = await get_supabase_service().create_website(
                     owner_id=user.user_id,
                     data={
                         "status": "draft",
@@ -238,14 +238,14 @@ async def generate_website(
                 print(f"[Architect] Website saved to Supabase: {website_id}")
                 
                 # Deduct credits after successful generation
-                await supabase_service.deduct_credits(
+                await get_supabase_service().deduct_credits(
                     user.user_id, 
                     "generate", 
                     f"[Architect] Generated: {business.business_name}"
                 )
                 
                 # Track usage
-                await supabase_service.increment_usage_limit(user.user_id, "generate")
+                await get_supabase_service().increment_usage_limit(user.user_id, "generate")
             except Exception as e:
                 print(f"[Architect] ERROR saving to Supabase: {e}")
                 # Fallback to local storage
@@ -307,7 +307,7 @@ async def generate_website_async(
     Poll /api/tasks/{task_id} to check status.
     """
     from app.workers.tasks import generate_website_task
-    from app.services.supabase import supabase_service
+    from app.services.supabase import get_supabase_service
     
     settings = get_settings()
     
@@ -328,21 +328,18 @@ async def generate_website_async(
             detail="Too many violations. Please try again later."
         )
     
-    # In production mode, check and deduct credits
+    # In production mode, check and deduct credits (one atomic call)
     if settings.is_production:
-        has_credits = await supabase_service.check_credits(user.user_id, "generate")
-        if not has_credits:
-            raise HTTPException(
-                status_code=402,
-                detail="Insufficient credits. Please purchase more credits."
-            )
-        
-        # Deduct credits
-        await supabase_service.deduct_credits(
+        deducted = await get_supabase_service().deduct_credits(
             user.user_id, 
             "generate", 
             f"Website generation: {request.description[:50]}..."
         )
+        if not deducted:
+            raise HTTPException(
+                status_code=402,
+                detail="Insufficient credits. Please purchase more credits."
+            )
     
     # Queue the task (with user_id for Supabase storage in production)
     task = generate_website_task.delay(
@@ -363,7 +360,7 @@ async def get_preview(
     user: AuthUser = Depends(require_auth)  # SECURITY: Require auth
 ):
     """Get website preview by ID (authenticated)."""
-    from app.services.supabase import supabase_service
+    from app.services.supabase import get_supabase_service
     import uuid as uuid_module
     
     # Check if it's a UUID (Supabase website) or site_* (local)
@@ -379,7 +376,7 @@ async def get_preview(
         settings = get_settings()
         if settings.is_production:
             # SECURITY: VULN-H01 fix - Verify ownership
-            website = await supabase_service.get_website(website_id, owner_id=user.id)
+            website = await get_supabase_service().get_website(website_id, owner_id=user.id)
             if website:
                 return {
                     "id": website_id,
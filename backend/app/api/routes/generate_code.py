@@ -336,8 +336,8 @@ async def generate_code(
 
     # In production mode, check credits
     if settings.is_production:
-        from app.services.supabase import supabase_service
-        has_credits = await supabase_service.check_credits(user.user_id, "generate")
+        from app.services.supabase import get_supabase_service
+        has_credits = await get_supabase_service().check_credits(user.user_id, "generate")
         if not has_credits:
             raise HTTPException(
                 status_code=402,
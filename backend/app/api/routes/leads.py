@@ -8,7 +8,7 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel, Field
 
-from app.services import supabase_service
+from app.services import get_supabase_service
 from app.core.auth_middleware import require_auth, AuthUser
 
 router = APIRouter()
@@ -82,7 +82,7 @@ async def submit_lead(lead: LeadSubmitRequest, request: Request):
         raise HTTPException(status_code=429, detail=msg)
     
     # Validate website exists
-    website = await supabase_service.get_website_public(lead.website_id)
+    website = await get_supabase_service().get_website_public(lead.website_id)
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
     
@@ -119,7 +119,7 @@ async def submit_lead(lead: LeadSubmitRequest, request: Request):
         }
     }
     
-    result = await supabase_service.create_lead(lead_data)
+    result = await get_supabase_service().create_lead(lead_data)
     
     if not result:
         raise HTTPException(status_code=500, detail="Failed to save lead")
@@ -148,7 +148,7 @@ async def get_dashboard_leads(
     
     Optionally filter by status or specific website.
     """
-    leads_data = await supabase_service.get_user_leads(
+    leads_data = await get_supabase_service().get_user_leads(
         owner_id=user.id,
         status=status,
         website_id=website_id,
@@ -157,7 +157,7 @@ async def get_dashboard_leads(
     )
     
     # Get stats
-    stats = await supabase_service.get_lead_stats(user.id)
+    stats = await get_supabase_service().get_lead_stats(user.id)
     
     return LeadsListResponse(
         leads=[
@@ -186,7 +186,7 @@ async def get_dashboard_leads(
 @router.get("/leads/{lead_id}", response_model=LeadResponse)
 async def get_lead(lead_id: str, user: AuthUser = Depends(require_auth)):
     """Get a specific lead by ID (must be owned by user's website)."""
-    lead = await supabase_service.get_lead(lead_id, user.id)
+    lead = await get_supabase_service().get_lead(lead_id, user.id)
     
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
@@ -213,7 +213,7 @@ async def update_lead_status(
     user: AuthUser = Depends(require_auth)
 ):
     """Update the status of a lead (new -> contacted -> converted)."""
-    success = await supabase_service.update_lead_status(
+    success = await get_supabase_service().update_lead_status(
         lead_id=lead_id,
         owner_id=user.id,
         status=update.status
@@ -232,7 +232,7 @@ async def update_lead_status(
 @router.delete("/leads/{lead_id}")
 async def delete_lead(lead_id: str, user: AuthUser = Depends(require_auth)):
     """Delete a lead (must be owned by user's website)."""
-    success = await supabase_service.delete_lead(lead_id, user.id)
+    success = await get_supabase_service().delete_lead(lead_id, user.id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Lead not found")
@@ -274,11 +274,11 @@ async def get_popup_settings(
 ):
     """Get popup settings for a website."""
     # Verify ownership
-    website = await supabase_service.get_website(website_id, user.id)
+    website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
     
-    popup_settings = await supabase_service.get_popup_settings(website_id)
+    popup_settings = await get_supabase_service().get_popup_settings(website_id)
     
     if not popup_settings:
         # Return defaults
@@ -304,12 +304,12 @@ async def update_popup_settings(
 ):
     """Update popup settings and trigger re-deployment."""
     # Verify ownership
-    website = await supabase_service.get_website(website_id, user.id)
+    website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
     
     # Update or create settings
-    popup_settings = await supabase_service.upsert_popup_settings(
+    popup_settings = await get_supabase_service().upsert_popup_settings(
         website_id=website_id,
         updates=update.dict(exclude_none=True)
     )
@@ -15,7 +15,7 @@ from pydantic import BaseModel
 from app.services import (
     get_published_site,
     get_site_by_subdomain,
-    supabase_service,
+    get_supabase_service,
     cloudflare_service,
     CREDIT_COSTS
 )
@@ -78,7 +78,7 @@ async def publish_site(website_id: str, user: AuthUser = Depends(require_auth)):
     # Try to get from Supabase first (only if valid UUID)
     if is_uuid:
         try:
-            website = await supabase_service.get_website(website_id, user.id)
+            website = await get_supabase_service().get_website(website_id, user.id)
         except Exception:
             pass  # Supabase not configured or table doesn't exist
     
@@ -101,7 +101,7 @@ async def publish_site(website_id: str, user: AuthUser = Depends(require_auth)):
     # Check if user has enough credits in production mode
     if settings.is_production:
         try:
-            has_credits = await supabase_service.check_credits(user.id, "publish")
+            has_credits = await get_supabase_service().check_credits(user.id, "publish")
             if not has_credits:
                 raise HTTPException(
                     status_code=402, 
@@ -126,7 +126,7 @@ async def publish_site(website_id: str, user: AuthUser = Depends(require_auth)):
         if settings.is_production:
             try:
                 # Create deployment record
-                await supabase_service.create_deployment(
+                await get_supabase_service().create_deployment(
                     website_id=website_id,
                     deployment_id=published.deployment_id,
                     subdomain=published.subdomain,
@@ -136,7 +136,7 @@ async def publish_site(website_id: str, user: AuthUser = Depends(require_auth)):
                 print(f"Deployment saved: {published.subdomain}")
                 
                 # Deduct credits
-                await supabase_service.deduct_credits(
+                await get_supabase_service().deduct_credits(
                     user.id, 
                     "publish", 
                     f"Published website {published.subdomain}"
@@ -145,7 +145,7 @@ async def publish_site(website_id: str, user: AuthUser = Depends(require_auth)):
                 
                 # Update website status if it's a UUID
                 if is_uuid:
-                    await supabase_service.publish_website(
+                    await get_supabase_service().publish_website(
                         website_id=website_id,
                         owner_id=user.id,
                         subdomain=published.subdomain,
@@ -153,7 +153,7 @@ async def publish_site(website_id: str, user: AuthUser = Depends(require_auth)):
                     )
                 
                 # Track usage
-                await supabase_service.increment_usage_limit(user.id, "publish")
+                await get_supabase_service().increment_usage_limit(user.id, "publish")
             except Exception as e:
                 print(f"Supabase operations failed: {e}")
                 # Don't fail the publish - the site is already live
@@ -186,7 +186,7 @@ async def republish_site(website_id: str, user: AuthUser = Depends(require_auth)
     # Try to get from Supabase first (only if valid UUID)
     if is_uuid:
         try:
-            website = await supabase_service.get_website(website_id, user.id)
+            website = await get_supabase_service().get_website(website_id, user.id)
         except Exception:
             pass
     
@@ -210,7 +210,7 @@ async def republish_site(website_id: str, user: AuthUser = Depends(require_auth)
         # Create version before republishing (only for UUID websites)
         if is_uuid:
             try:
-                await supabase_service.create_website_version(
+                await get_supabase_service().create_website_version(
                     website_id=website_id,
                     html=html_content,
                     business_json=website.get("business_json") or website.get("business"),
@@ -229,7 +229,7 @@ async def republish_site(website_id: str, user: AuthUser = Depends(require_auth)
         # Update website in Supabase (only for UUID websites)
         if is_uuid:
             try:
-                await supabase_service.update_website(
+                await get_supabase_service().update_website(
                     website_id=website_id,
                     owner_id=user.id,
                     updates={
@@ -268,7 +268,7 @@ async def unpublish_site(website_id: str, user: AuthUser = Depends(require_auth)
     # Verify ownership
     if is_uuid:
         try:
-            website = await supabase_service.get_website(website_id, user.id)
+            website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
         except Exception:
             website = None
     else:
@@ -287,7 +287,7 @@ async def unpublish_site(website_id: str, user: AuthUser = Depends(require_auth)
     # Update status in Supabase (only for UUID websites)
     if is_uuid:
         try:
-            await supabase_service.update_website(
+            await get_supabase_service().update_website(
                 website_id=website_id,
                 owner_id=user.id,
                 updates={"status": "draft", "live_url": None, "subdomain": None}
@@ -308,11 +308,11 @@ async def get_publish_status(
     if is_valid_uuid(website_id):
         try:
             # SECURITY: Verify ownership before returning status
-            website = await supabase_service.get_website(website_id, user.id)
+            website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
             if not website:
                 raise HTTPException(status_code=404, detail="Website not found")
             
-            deployment = await supabase_service.get_deployment(website_id)
+            deployment = await get_supabase_service().get_deployment(website_id)
             
             if deployment:
                 return {
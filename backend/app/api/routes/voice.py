@@ -24,6 +24,18 @@ from app.core.auth_middleware import require_auth, AuthUser
 
 router = APIRouter()
 
+MAX_AUDIO_BYTES = 25 * 1024 * 1024  # Whisper upload limit
+
+
+def _get_upload_size(upload: UploadFile) -> int:
+    """Size of an uploaded file without reading it into memory."""
+    if upload.size is not None:
+        return upload.size
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
 
 class TranscribeResponse(BaseModel):
     """Response from transcription endpoint."""
@@ -64,16 +76,17 @@ async def transcribe_voice(
             detail=f"Unsupported audio format: {content_type}. Supported: WebM, MP4, M4A, WAV, MP3"
         )
     
-    # Read audio data
+    # Read only the header; the body is streamed to Whisper
     try:
-        audio_data = await audio.read()
+        header = audio.file.read(2048)
+        audio.file.seek(0)
     except Exception as e:
         raise HTTPException(status_code=400, detail="Failed to read audio file")
     
     # SECURITY: Validate actual file content (magic bytes) to prevent MIME spoofing
     try:
         import magic
-        actual_type = magic.from_buffer(audio_data[:2048], mime=True)
+        actual_type = magic.from_buffer(header, mime=True)
         allowed_audio_types = [
             "audio/", "video/webm", "video/mp4", "application/octet-stream"
         ]
@@ -92,14 +105,14 @@ async def transcribe_voice(
         print(f"[Voice] Magic validation error: {e}")
     
     # Check file size (max 25MB for Whisper)
-    if len(audio_data) > 25 * 1024 * 1024:
+    if _get_upload_size(audio) > MAX_AUDIO_BYTES:
         raise HTTPException(status_code=400, detail="Audio file too large. Maximum size is 25MB.")
     
     # Transcribe
     try:
         lang_hint = None if language == "auto" else language
-        result = transcribe_audio(
-            audio_data=audio_data,
+        result = await transcribe_audio(
+            audio_stream=audio.file,
             filename=audio.filename or "audio.webm",
             language=lang_hint,
             api_key=settings.openai_api_key
@@ -147,17 +160,17 @@ async def voice_to_website(
         )
     
     try:
-        audio_data = await audio.read()
+        audio_size = _get_upload_size(audio)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read audio: {str(e)}")
     
-    if len(audio_data) > 25 * 1024 * 1024:
+    if audio_size > MAX_AUDIO_BYTES:
         raise HTTPException(status_code=400, detail="Audio file too large. Maximum size is 25MB.")
     
     try:
         lang_hint = None if language == "auto" else language
-        transcription = transcribe_audio(
-            audio_data=audio_data,
+        transcription = await transcribe_audio(
+            audio_stream=audio.file,
             filename=audio.filename or "audio.webm",
             language=lang_hint,
             api_key=settings.openai_api_key
@@ -278,7 +291,7 @@ async def voice_to_website_async(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read audio: {str(e)}")
     
-    if len(audio_data) > 25 * 1024 * 1024:
+    if len(audio_data) > MAX_AUDIO_BYTES:
         raise HTTPException(status_code=400, detail="Audio file too large. Maximum size is 25MB.")
     
     # Encode audio as base64 for Celery (JSON serializable)
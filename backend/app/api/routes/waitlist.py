@@ -8,7 +8,7 @@ from pydantic import BaseModel, EmailStr, Field, validator
 import re
 from typing import Optional
 
-from app.services.supabase import supabase_service
+from app.services.supabase import get_supabase_service
 from app.services.rate_limiter import rate_limiter
 
 router = APIRouter()
@@ -72,7 +72,7 @@ async def join_waitlist(entry: WaitlistEntry, request: Request):
     
     try:
         # Check if Supabase is configured
-        if not supabase_service.is_configured():
+        if not get_supabase_service().is_configured():
             # Fallback to JSON file storage (existing implementation)
             raise HTTPException(
                 status_code=503,
@@ -80,7 +80,7 @@ async def join_waitlist(entry: WaitlistEntry, request: Request):
             )
         
         # Check for duplicates
-        is_duplicate = await supabase_service.check_duplicate(entry.contact)
+        is_duplicate = await get_supabase_service().check_duplicate(entry.contact)
         if is_duplicate:
             raise HTTPException(
                 status_code=400,
@@ -89,7 +89,7 @@ async def join_waitlist(entry: WaitlistEntry, request: Request):
         
         # Add to waitlist
         user_agent = request.headers.get("User-Agent", "unknown")
-        result = await supabase_service.add_waitlist_entry(
+        result = await get_supabase_service().add_waitlist_entry(
             contact=entry.contact,
             contact_type=entry.contact_type,
             business_description=entry.business_description,
@@ -122,10 +122,10 @@ async def get_waitlist_count():
     Note: Does not expose individual entries, only count.
     """
     try:
-        if not supabase_service.is_configured():
+        if not get_supabase_service().is_configured():
             return {"count": 0, "message": "Waitlist service not configured"}
         
-        count = await supabase_service.get_waitlist_count()
+        count = await get_supabase_service().get_waitlist_count()
         return {"count": count}
         
     except Exception as e:
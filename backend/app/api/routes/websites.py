@@ -7,7 +7,7 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 
-from app.services import supabase_service
+from app.services import get_supabase_service
 from app.core.auth_middleware import require_auth, AuthUser
 
 router = APIRouter()
@@ -25,6 +25,8 @@ class WebsiteResponse(BaseModel):
     published_at: Optional[str] = None
     created_at: str
     updated_at: Optional[str] = None
+    deployment_id: Optional[str] = None
+    latest_version: Optional[int] = None
 
 
 class WebsiteListResponse(BaseModel):
@@ -50,7 +52,8 @@ async def get_user_websites(
     
     Optionally filter by status (draft, live, archived).
     """
-    websites = await supabase_service.get_user_websites(
+    # Websites, latest deployment and latest version in one query
+    websites = await get_supabase_service().get_user_dashboard(
         owner_id=user.id,
         status=status
     )
@@ -67,7 +70,9 @@ async def get_user_websites(
                 source_type=w.get("source_type", "text"),
                 published_at=w.get("published_at"),
                 created_at=w.get("created_at"),
-                updated_at=w.get("updated_at")
+                updated_at=w.get("updated_at"),
+                deployment_id=w.get("deployment_id"),
+                latest_version=w.get("latest_version")
             )
             for w in websites
         ],
@@ -78,7 +83,7 @@ async def get_user_websites(
 @router.get("/websites/{website_id}", response_model=WebsiteResponse)
 async def get_website(website_id: str, user: AuthUser = Depends(require_auth)):
     """Get a specific website by ID."""
-    website = await supabase_service.get_website(website_id, user.id)
+    website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
     
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
@@ -100,7 +105,7 @@ async def get_website(website_id: str, user: AuthUser = Depends(require_auth)):
 @router.delete("/websites/{website_id}")
 async def delete_website(website_id: str, user: AuthUser = Depends(require_auth)):
     """Delete a website (requires ownership)."""
-    success = await supabase_service.delete_website(website_id, user.id)
+    success = await get_supabase_service().delete_website(website_id, user.id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Website not found")
@@ -115,11 +120,11 @@ async def get_website_versions(
 ):
     """Get version history for a website."""
     # Verify ownership first
-    website = await supabase_service.get_website(website_id, user.id)
+    website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
     
-    versions = await supabase_service.get_website_versions(website_id)
+    versions = await get_supabase_service().get_website_versions(website_id)
     
     return {
         "website_id": website_id,
@@ -147,17 +152,17 @@ async def rollback_website(
     Restores the HTML and business data from the specified version.
     """
     # Verify ownership
-    website = await supabase_service.get_website(website_id, user.id)
+    website = await get_supabase_service().get_website(website_id, user.id, include_html=False)
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
     
     # Get the version
-    version_data = await supabase_service.get_website_version(website_id, version)
+    version_data = await get_supabase_service().get_website_version(website_id, version)
     if not version_data:
         raise HTTPException(status_code=404, detail=f"Version {version} not found")
     
     # Update website with version data
-    await supabase_service.update_website(
+    await get_supabase_service().update_website(
         website_id=website_id,
         owner_id=user.id,
         updates={
@@ -177,7 +182,7 @@ async def rollback_website(
 @router.get("/credits", response_model=CreditsResponse)
 async def get_user_credits(user: AuthUser = Depends(require_auth)):
     """Get the authenticated user's credit balance."""
-    credits = await supabase_service.get_user_credits(user.id)
+    credits = await get_supabase_service().get_user_credits(user.id)
     
     return CreditsResponse(
         balance=credits.get("balance", 0),
@@ -193,7 +198,7 @@ async def get_credit_costs():
     Fetches from database if available, falls back to hardcoded defaults.
     """
     # Try to fetch from database first
-    costs = await supabase_service.get_credit_costs_from_db()
+    costs = await get_supabase_service().get_credit_costs_from_db()
     
     return {
         "costs": costs,
@@ -218,7 +223,7 @@ async def get_payment_links(market: str = "GLOBAL"):
     Returns:
         Payment link data including URL, amount, currency, features
     """
-    payment_link = await supabase_service.get_payment_links(market)
+    payment_link = await get_supabase_service().get_payment_links(market)
     
     if not payment_link:
         # SECURITY: Return error instead of hardcoded fallback
@@ -233,7 +238,7 @@ async def get_payment_links(market: str = "GLOBAL"):
 @router.get("/payment-links/all")
 async def get_all_payment_links():
     """Get all active payment links for all markets."""
-    links = await supabase_service.get_all_payment_links()
+    links = await get_supabase_service().get_all_payment_links()
     
     if not links:
         # SECURITY: VULN-07 fix - Don't return hardcoded test payment links
@@ -67,6 +67,7 @@ class Settings(BaseSettings):
     cloudflare_account_id: str = ""
     cloudflare_api_token: str = ""
     cloudflare_pages_project: str = ""
+    cloudflare_zone_id: str = ""  # Zone of base_domain, for cache purges
     
     # Cloudflare R2 Storage
     cloudflare_r2_access_key: str = ""
@@ -6,6 +6,7 @@ Supports dynamic rate limits from Supabase in production mode.
 
 import time
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Optional, Dict
 from upstash_redis import Redis
 
@@ -34,6 +35,13 @@ class UpstashRateLimiter:
         "edit": {"limit": 30, "window": 3600},        # 30 per hour
     }
     
+    # INCRBY + EXPIRE-on-first-hit in one atomic round-trip
+    _INCR_EXPIRE_SCRIPT = (
+        "local c = redis.call('INCRBY', KEYS[1], ARGV[2]) "
+        "if c == tonumber(ARGV[2]) then redis.call('EXPIRE', KEYS[1], ARGV[1]) end "
+        "return c"
+    )
+    
     def __init__(self):
         settings = get_settings()
         self._redis: Optional[Redis] = None
@@ -45,6 +53,16 @@ class UpstashRateLimiter:
         self._dynamic_limits: Optional[Dict] = None
         self._limits_fetched_at: float = 0
         self._cache_ttl = 300  # Cache limits for 5 minutes
+        
+        # Short-lived in-process cache of allow decisions and abuse scores.
+        # Cached allows are only served while well under the limit and
+        # inside the same window; each one is still counted in Upstash
+        # right away by a background INCRBY.
+        self._local_cache_ttl = 1.0
+        self._local_cache_max_entries = 10000
+        self._decision_cache: Dict[str, Tuple[float, int, int, int]] = {}  # key -> (ts, remaining, served, window index)
+        self._hit_recorder = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ratelimit-hits")
+        self._abuse_score_cache: Dict[str, Tuple[float, int]] = {}
     
     @property
     def RATE_LIMITS(self) -> Dict:
@@ -65,8 +83,8 @@ class UpstashRateLimiter:
             return
         
         try:
-            from app.services.supabase import supabase_service
-            limits = await supabase_service.get_rate_limits()
+            from app.services.supabase import get_supabase_service
+            limits = await get_supabase_service().get_rate_limits()
             
             if limits:
                 self._dynamic_limits = limits
@@ -94,11 +112,35 @@ class UpstashRateLimiter:
             self._token != ""
         )
     
+    def _incr_with_expiry(self, key: str, ttl_seconds: int, amount: int = 1) -> int:
+        """Increment a counter, setting its TTL when it is first created."""
+        count = self.redis.eval(
+            self._INCR_EXPIRE_SCRIPT, [key], [str(ttl_seconds), str(amount)]
+        )
+        return int(count)
+    
+    def _record_hit(self, window_key: str, ttl_seconds: int):
+        """Count a locally allowed hit in Upstash (runs on the hit recorder thread)."""
+        try:
+            self._incr_with_expiry(window_key, ttl_seconds)
+        except Exception as e:
+            print(f"Upstash deferred hit error: {e}")
+    
+    def _prune_local_cache(self, cache: Dict, now: float):
+        """Drop stale entries once a local cache grows past its bound."""
+        if len(cache) < self._local_cache_max_entries:
+            return
+        for cache_key in [k for k, v in cache.items() if now - v[0] >= self._local_cache_ttl]:
+            cache.pop(cache_key, None)
+        if len(cache) >= self._local_cache_max_entries:
+            cache.clear()
+    
     def is_rate_limited(
         self, 
         key: str, 
         limit: int, 
-        window_seconds: int
+        window_seconds: int,
+        amount: int = 1
     ) -> Tuple[bool, int, int]:
         """
         Check if a request is rate limited.
@@ -107,6 +149,7 @@ class UpstashRateLimiter:
             key: Unique identifier (e.g., "user:{user_id}:generate")
             limit: Maximum requests allowed in window
             window_seconds: Time window in seconds
+            amount: Number of hits to record
         
         Returns:
             Tuple of (is_limited, current_count, remaining)
@@ -120,12 +163,8 @@ class UpstashRateLimiter:
             now = int(time.time())
             window_key = f"ratelimit:{key}:{now // window_seconds}"
             
-            # Increment counter
-            count = self.redis.incr(window_key)
-            
-            # Set expiry on first request in window
-            if count == 1:
-                self.redis.expire(window_key, window_seconds)
+            # Increment counter (expiry set atomically on first request in window)
+            count = self._incr_with_expiry(window_key, window_seconds, amount)
             
             is_limited = count > limit
             remaining = max(0, limit - count)
@@ -157,14 +196,32 @@ class UpstashRateLimiter:
         window = config["window"]
         
         key = f"user:{user_id}:{action}"
+        now = time.monotonic()
+        window_index = int(time.time()) // window
+        
+        # Serve recent allow decisions locally while comfortably under the
+        # limit; a decision never outlives the window it was made in
+        cached = self._decision_cache.get(key)
+        if cached and now - cached[0] < self._local_cache_ttl and cached[3] == window_index:
+            cached_at, cached_remaining, served, _ = cached
+            if served + 1 < cached_remaining // 2 and self.is_configured():
+                self._decision_cache[key] = (cached_at, cached_remaining, served + 1, window_index)
+                self._hit_recorder.submit(
+                    self._record_hit, f"ratelimit:{key}:{window_index}", window
+                )
+                return True, "OK", cached_remaining - served - 1
+        
         is_limited, count, remaining = self.is_rate_limited(key, limit, window)
         
         if is_limited:
+            self._decision_cache.pop(key, None)
             # Calculate retry time
             window_name = self._format_window(window)
             message = f"Rate limit exceeded for {action}. Try again in {window_name}."
             return False, message, 0
         
+        self._prune_local_cache(self._decision_cache, now)
+        self._decision_cache[key] = (now, remaining, 0, window_index)
         return True, "OK", remaining
     
     def _format_window(self, seconds: int) -> str:
@@ -199,12 +256,8 @@ class UpstashRateLimiter:
         
         try:
             key = f"abuse:{user_id}:{signal}"
-            count = self.redis.incr(key)
-            
-            if count == 1:
-                self.redis.expire(key, ttl_seconds)
-            
-            return count
+            self._abuse_score_cache.pop(user_id, None)
+            return self._incr_with_expiry(key, ttl_seconds)
             
         except Exception as e:
             print(f"Upstash abuse tracking error: {e}")
@@ -220,16 +273,21 @@ class UpstashRateLimiter:
         if not self.is_configured():
             return 0
         
+        now = time.monotonic()
+        cached = self._abuse_score_cache.get(user_id)
+        if cached and now - cached[0] < self._local_cache_ttl:
+            return cached[1]
+        
         try:
             signals = ["failed_jobs", "rapid_requests", "limit_violations"]
-            total = 0
+            keys = [f"abuse:{user_id}:{signal}" for signal in signals]
             
-            for signal in signals:
-                key = f"abuse:{user_id}:{signal}"
-                count = self.redis.get(key)
-                if count:
-                    total += int(count)
+            # Fetch all signal counters in a single round-trip
+            values = self.redis.mget(*keys)
+            total = sum(int(count) for count in values if count)
             
+            self._prune_local_cache(self._abuse_score_cache, now)
+            self._abuse_score_cache[user_id] = (now, total)
             return total
             
         except Exception as e:
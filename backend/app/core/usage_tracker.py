@@ -3,11 +3,13 @@ Usage Tracker
 Tracks API usage per user with daily/monthly limits.
 """
 
+import time
+import asyncio
 from datetime import datetime, date
-from typing import Optional
+from typing import Optional, Dict, Tuple
 from pydantic import BaseModel
 
-from app.services.supabase import supabase_service
+from app.services.supabase import get_supabase_service
 
 
 # Usage limits for free tier
@@ -20,6 +22,19 @@ FREE_TIER_LIMITS = {
     "max_published_sites": 1,
 }
 
+# Columns UsageInfo is built from (avoid select("*") on every lookup)
+USAGE_COLUMNS = (
+    "daily_generates,daily_voice_generates,daily_edits,daily_redesigns,"
+    "monthly_generates,published_sites,last_reset_date"
+)
+
+# Limits hoisted to constants so per-request checks skip the dict lookups
+_DAILY_GENERATES_LIMIT = FREE_TIER_LIMITS["daily_generates"]
+_DAILY_VOICE_GENERATES_LIMIT = FREE_TIER_LIMITS["daily_voice_generates"]
+_DAILY_EDITS_LIMIT = FREE_TIER_LIMITS["daily_edits"]
+_DAILY_REDESIGNS_LIMIT = FREE_TIER_LIMITS["daily_redesigns"]
+_MAX_PUBLISHED_SITES = FREE_TIER_LIMITS["max_published_sites"]
+
 
 class UsageInfo(BaseModel):
     """Usage information for a user."""
@@ -33,90 +48,81 @@ class UsageInfo(BaseModel):
     last_reset_date: Optional[str] = None
     
     def can_generate(self) -> bool:
-        return self.daily_generates < FREE_TIER_LIMITS["daily_generates"]
+        return self.daily_generates < _DAILY_GENERATES_LIMIT
     
     def can_voice_generate(self) -> bool:
-        return self.daily_voice_generates < FREE_TIER_LIMITS["daily_voice_generates"]
+        return self.daily_voice_generates < _DAILY_VOICE_GENERATES_LIMIT
     
     def can_edit(self) -> bool:
-        return self.daily_edits < FREE_TIER_LIMITS["daily_edits"]
+        return self.daily_edits < _DAILY_EDITS_LIMIT
     
     def can_redesign(self) -> bool:
-        return self.daily_redesigns < FREE_TIER_LIMITS["daily_redesigns"]
+        return self.daily_redesigns < _DAILY_REDESIGNS_LIMIT
     
     def can_publish(self) -> bool:
-        return self.published_sites < FREE_TIER_LIMITS["max_published_sites"]
+        return self.published_sites < _MAX_PUBLISHED_SITES
     
     def get_remaining(self) -> dict:
         return {
-            "generates": FREE_TIER_LIMITS["daily_generates"] - self.daily_generates,
-            "voice_generates": FREE_TIER_LIMITS["daily_voice_generates"] - self.daily_voice_generates,
-            "edits": FREE_TIER_LIMITS["daily_edits"] - self.daily_edits,
-            "redesigns": FREE_TIER_LIMITS["daily_redesigns"] - self.daily_redesigns,
-            "published_sites": FREE_TIER_LIMITS["max_published_sites"] - self.published_sites,
+            "generates": _DAILY_GENERATES_LIMIT - self.daily_generates,
+            "voice_generates": _DAILY_VOICE_GENERATES_LIMIT - self.daily_voice_generates,
+            "edits": _DAILY_EDITS_LIMIT - self.daily_edits,
+            "redesigns": _DAILY_REDESIGNS_LIMIT - self.daily_redesigns,
+            "published_sites": _MAX_PUBLISHED_SITES - self.published_sites,
         }
 
 
 class UsageTracker:
     """Tracks and enforces usage limits per user."""
     
+    def __init__(self):
+        # Per-user usage memoized briefly to skip repeat Supabase SELECTs
+        self._cache: Dict[str, Tuple[float, UsageInfo]] = {}
+        self._cache_ttl = 5  # seconds
+        
+        # usage_logs rows are queued and written in multi-row batches
+        self._log_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        self._log_flush_task: Optional[asyncio.Task] = None
+        self._log_batch_size = 100
+        self._log_flush_interval = 0.5  # seconds
+    
+    def _cache_usage(self, usage: UsageInfo) -> UsageInfo:
+        """Store a usage snapshot and return a copy for the caller."""
+        self._cache[usage.user_id] = (time.monotonic(), usage)
+        return usage.model_copy()
+    
     async def get_or_create_usage(self, user_id: str) -> UsageInfo:
         """Get or create usage record for a user."""
+        today = date.today().isoformat()
+        
+        cached = self._cache.get(user_id)
+        if cached:
+            cached_at, usage = cached
+            if time.monotonic() - cached_at < self._cache_ttl and usage.last_reset_date == today:
+                return usage.model_copy()
+            self._cache.pop(user_id, None)
+        
         try:
-            client = supabase_service.get_client()
+            client = await get_supabase_service().get_async_client()
             
-            # Try to get existing usage record
-            response = client.table("usage_limits").select("*").eq("user_id", user_id).execute()
+            # Read, reset-if-stale or create in one call (see migrations/010)
+            response = await client.rpc(
+                "get_or_reset_usage",
+                {"p_user_id": user_id, "p_today": today}
+            ).select(USAGE_COLUMNS).execute()
             
-            today = date.today().isoformat()
+            record = response.data[0] if response.data else {}
             
-            if response.data and len(response.data) > 0:
-                record = response.data[0]
-                
-                # Check if we need to reset daily counts
-                last_reset = record.get("last_reset_date")
-                if last_reset != today:
-                    # Reset daily counts
-                    client.table("usage_limits").update({
-                        "daily_generates": 0,
-                        "daily_voice_generates": 0,
-                        "daily_edits": 0,
-                        "daily_redesigns": 0,
-                        "last_reset_date": today
-                    }).eq("user_id", user_id).execute()
-                    
-                    record["daily_generates"] = 0
-                    record["daily_voice_generates"] = 0
-                    record["daily_edits"] = 0
-                    record["daily_redesigns"] = 0
-                
-                return UsageInfo(
-                    user_id=user_id,
-                    daily_generates=record.get("daily_generates", 0),
-                    daily_voice_generates=record.get("daily_voice_generates", 0),
-                    daily_edits=record.get("daily_edits", 0),
-                    daily_redesigns=record.get("daily_redesigns", 0),
-                    monthly_generates=record.get("monthly_generates", 0),
-                    published_sites=record.get("published_sites", 0),
-                    last_reset_date=today
-                )
-            else:
-                # Create new usage record
-                client.table("usage_limits").insert({
-                    "user_id": user_id,
-                    "daily_generates": 0,
-                    "daily_voice_generates": 0,
-                    "daily_edits": 0,
-                    "daily_redesigns": 0,
-                    "monthly_generates": 0,
-                    "published_sites": 0,
-                    "last_reset_date": today
-                }).execute()
-                
-                return UsageInfo(
-                    user_id=user_id,
-                    last_reset_date=today
-                )
+            return self._cache_usage(UsageInfo(
+                user_id=user_id,
+                daily_generates=record.get("daily_generates", 0),
+                daily_voice_generates=record.get("daily_voice_generates", 0),
+                daily_edits=record.get("daily_edits", 0),
+                daily_redesigns=record.get("daily_redesigns", 0),
+                monthly_generates=record.get("monthly_generates", 0),
+                published_sites=record.get("published_sites", 0),
+                last_reset_date=today
+            ))
                 
         except Exception as e:
             print(f"Error getting usage: {e}")
@@ -131,7 +137,7 @@ class UsageTracker:
         Returns True if successful.
         """
         try:
-            client = supabase_service.get_client()
+            client = await get_supabase_service().get_async_client()
             
             column_map = {
                 "generate": "daily_generates",
@@ -145,25 +151,32 @@ class UsageTracker:
             if not column:
                 return False
             
-            # Get current value and increment
-            response = client.table("usage_limits").select(column).eq("user_id", user_id).execute()
+            # Atomic UPDATE ... SET col = col + 1 (see migrations/009)
+            response = await client.rpc(
+                "increment_usage",
+                {"p_user_id": user_id, "p_usage_type": usage_type}
+            ).execute()
             
             if response.data and len(response.data) > 0:
-                current = response.data[0].get(column, 0)
-                update_data = {column: current + 1}
-                
-                # Also increment monthly generates
-                if usage_type in ["generate", "voice_generate"]:
-                    monthly = response.data[0].get("monthly_generates", 0) if "monthly_generates" in response.data[0] else 0
-                    update_data["monthly_generates"] = monthly + 1
+                record = response.data[0]
                 
-                client.table("usage_limits").update(update_data).eq("user_id", user_id).execute()
+                # Keep the cached snapshot in step with the write
+                cached = self._cache.get(user_id)
+                if cached:
+                    usage = cached[1]
+                    usage.daily_generates = record.get("daily_generates", 0)
+                    usage.daily_voice_generates = record.get("daily_voice_generates", 0)
+                    usage.daily_edits = record.get("daily_edits", 0)
+                    usage.daily_redesigns = record.get("daily_redesigns", 0)
+                    usage.monthly_generates = record.get("monthly_generates", 0)
+                    usage.published_sites = record.get("published_sites", 0)
                 return True
             
             return False
             
         except Exception as e:
             print(f"Error incrementing usage: {e}")
+            self._cache.pop(user_id, None)
             return False
     
     async def log_usage(
@@ -173,20 +186,71 @@ class UsageTracker:
         endpoint: str,
         success: bool = True
     ):
-        """Log API usage to usage_logs table."""
+        """Log API usage to usage_logs table (batched when the flusher is running)."""
+        row = {
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "endpoint": endpoint,
+            "success": success,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        
+        if self._log_flush_task and not self._log_flush_task.done():
+            try:
+                self._log_queue.put_nowait(row)
+            except asyncio.QueueFull:
+                print("Usage log queue full - dropping entry")
+            return
+        
+        # No flusher running (e.g. Celery worker): insert directly
+        await self._insert_logs([row])
+    
+    async def _insert_logs(self, rows: list[dict]):
+        """Write usage log rows in a single multi-row INSERT."""
         try:
-            client = supabase_service.get_client()
-            
-            client.table("usage_logs").insert({
-                "user_id": user_id,
-                "ip_address": ip_address,
-                "endpoint": endpoint,
-                "success": success,
-                "created_at": datetime.utcnow().isoformat()
-            }).execute()
+            client = await get_supabase_service().get_async_client()
+            await client.table("usage_logs").insert(rows).execute()
             
         except Exception as e:
             print(f"Error logging usage: {e}")
+    
+    async def _run_log_flusher(self):
+        """Drain queued log rows every flush interval or batch size, whichever first."""
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._log_queue.get()
+            deadline = time.monotonic() + self._log_flush_interval
+            
+            while True:
+                if item is None:  # Shutdown sentinel
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self._log_batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._log_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            
+            if batch:
+                await self._insert_logs(batch)
+    
+    def start_log_flusher(self):
+        """Start the background usage log flusher (call on app startup)."""
+        if self._log_flush_task is None or self._log_flush_task.done():
+            self._log_flush_task = asyncio.create_task(self._run_log_flusher())
+    
+    async def stop_log_flusher(self):
+        """Flush any queued log rows and stop the flusher (call on app shutdown)."""
+        if self._log_flush_task and not self._log_flush_task.done():
+            await self._log_queue.put(None)
+            await self._log_flush_task
+        self._log_flush_task = None
 
 
 # Global instance
@@ -13,6 +13,10 @@ load_dotenv()
 from app.api.routes import waitlist, generate, generate_code, publish, sites, voice, edit, redesign, tasks, auth, usage, websites, leads, upload
 from app.core.config import get_settings
 from app.core.rate_limiter import rate_limit_middleware
+from app.core.usage_tracker import usage_tracker
+from app.services.cloudflare_service import cloudflare_service
+from app.services.r2_service import r2_service
+from app.services.supabase import get_supabase_service
 
 settings = get_settings()
 
@@ -54,6 +58,23 @@ async def security_headers_middleware(request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start background workers (batched usage logging, cache invalidation) and open pooled clients."""
+    usage_tracker.start_log_flusher()
+    get_supabase_service().start_cache_invalidator()
+    await r2_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Flush pending usage logs and close pooled HTTP clients before exit."""
+    await usage_tracker.stop_log_flusher()
+    await cloudflare_service.close()
+    await r2_service.close()
+    await get_supabase_service().aclose()
+
+
 # Rate limiting middleware
 app.middleware("http")(rate_limit_middleware)
 
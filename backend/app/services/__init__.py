@@ -7,7 +7,7 @@ from .deploy import (
     get_site_by_subdomain,
     PublishedSite
 )
-from .supabase import supabase_service, CREDIT_COSTS
+from .supabase import get_supabase_service, CREDIT_COSTS
 from .rate_limiter import rate_limiter
 from .scraper import (
     scrape_website,
@@ -25,7 +25,7 @@ __all__ = [
     "get_published_site",
     "get_site_by_subdomain",
     "PublishedSite",
-    "supabase_service",
+    "get_supabase_service",
     "CREDIT_COSTS",
     "rate_limiter",
     "scrape_website",
@@ -38,3 +38,10 @@ __all__ = [
     "r2_service",
     "R2Service",
 ]
+
+
+def __getattr__(name: str):
+    # Backward compatibility: `supabase_service` resolves to the lazy singleton
+    if name == "supabase_service":
+        return get_supabase_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,13 +4,38 @@ Handles deployment of static websites to Cloudflare Pages.
 """
 
 import httpx
+import logging
 import re
-from typing import Optional
+import time
+import asyncio
+import random
+from typing import Optional, Dict, Tuple, Union
 from datetime import datetime
 from pydantic import BaseModel
 
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+
+# Any run of characters not allowed in a subdomain collapses to one hyphen
+_SUBDOMAIN_INVALID_RE = re.compile(r'[^a-z0-9]+')
+
+# Deployment status polling cache: in-progress builds are re-fetched after a
+# few seconds, finished ones rarely change so they are kept much longer
+_STATUS_CACHE_TTL = 3  # seconds
+_TERMINAL_STATUS_CACHE_TTL = 300  # seconds
+_TERMINAL_STATUSES = frozenset({"success", "failure", "canceled"})
+_STATUS_CACHE_MAX_ENTRIES = 1024
+
+# Cloudflare API retry policy: rate limits and transient server errors are
+# retried with jittered exponential backoff (or the server's Retry-After)
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 5
+_BACKOFF_INITIAL = 0.5  # seconds
+_BACKOFF_MAX = 10  # seconds
+_MAX_CONCURRENT_REQUESTS = 30
+
 
 class DeploymentResult(BaseModel):
     """Result of a Cloudflare Pages deployment."""
@@ -30,32 +55,87 @@ class CloudflareService:
         self.account_id = settings.cloudflare_account_id
         self.api_token = settings.cloudflare_api_token
         self.pages_project = settings.cloudflare_pages_project
+        self.zone_id = settings.cloudflare_zone_id
         self.base_domain = settings.base_domain
         self.api_base = "https://api.cloudflare.com/client/v4"
-        self._client: Optional[httpx.AsyncClient] = None
+        # Settings don't change at runtime; evaluate once
+        self._configured = bool(
+            self.account_id and 
+            self.api_token and 
+            self.pages_project and
+            self.account_id != "" and
+            self.api_token != ""
+        )
+        self._client: Optional[httpx.AsyncClient] = self._create_client()
+        # Credentials wrangler reads from its environment, built once
+        self._wrangler_credentials = {
+            "CLOUDFLARE_ACCOUNT_ID": self.account_id or "",
+            "CLOUDFLARE_API_TOKEN": self.api_token or ""
+        }
+        # Caps in-flight API calls so bursts queue here instead of tripping 429s
+        self._request_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        # deployment_id -> (expires_at, status dict)
+        self._status_cache: Dict[str, Tuple[float, dict]] = {}
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP/2 client shared by all Cloudflare API calls."""
+        return httpx.AsyncClient(
+            base_url=self.api_base,
+            headers={"Authorization": f"Bearer {self.api_token}"},
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30
+            ),
+            timeout=httpx.Timeout(connect=5.0, read=60.0, write=60.0, pool=5.0)
+        )
     
     @property
     def client(self) -> httpx.AsyncClient:
-        """Get or create async HTTP client."""
+        """Get the shared async HTTP client (recreated if closed)."""
+        # Built eagerly in __init__. The check-and-create below has no await,
+        # so concurrent coroutines can't both see None and build two pools
         if self._client is None:
-            self._client = httpx.AsyncClient(
-                headers={
-                    "Authorization": f"Bearer {self.api_token}",
-                    "Content-Type": "application/json"
-                },
-                timeout=60.0
-            )
+            self._client = self._create_client()
         return self._client
     
     def is_configured(self) -> bool:
         """Check if Cloudflare is properly configured."""
-        return bool(
-            self.account_id and 
-            self.api_token and 
-            self.pages_project and
-            self.account_id != "" and
-            self.api_token != ""
-        )
+        return self._configured
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Make a Cloudflare API call, retrying 429/5xx and transport errors.
+        
+        Waits honor Retry-After when given, otherwise back off exponentially
+        with full jitter. The last response (or error) is returned/raised once
+        attempts run out.
+        """
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                async with self._request_semaphore:
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == _MAX_ATTEMPTS:
+                    raise
+                response = None
+            
+            if response is not None and (
+                response.status_code not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS
+            ):
+                return response
+            
+            delay = random.uniform(0, min(_BACKOFF_MAX, _BACKOFF_INITIAL * 2 ** (attempt - 1)))
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            if retry_after and retry_after.isdigit():
+                delay = min(float(retry_after), _BACKOFF_MAX)
+            
+            logger.warning(
+                "Cloudflare API %s %s failed (attempt %s/%s), retrying in %.2fs",
+                method, url, attempt, _MAX_ATTEMPTS, delay
+            )
+            await asyncio.sleep(delay)
     
     def generate_subdomain(self, business_name: str) -> str:
         """
@@ -69,18 +149,10 @@ class CloudflareService:
         """
         import uuid
         
-        # Convert to lowercase and replace spaces
-        subdomain = business_name.lower()
-        # Remove special characters
-        subdomain = re.sub(r'[^a-z0-9\s-]', '', subdomain)
-        # Replace spaces with hyphens
-        subdomain = re.sub(r'\s+', '-', subdomain)
-        # Remove consecutive hyphens
-        subdomain = re.sub(r'-+', '-', subdomain)
-        # Trim hyphens from ends
-        subdomain = subdomain.strip('-')
+        # Lowercase, collapse invalid runs to a hyphen, trim hyphens from ends
+        subdomain = _SUBDOMAIN_INVALID_RE.sub('-', business_name.lower()).strip('-')
         # Limit length to leave room for unique suffix
-        subdomain = subdomain[:24]
+        subdomain = subdomain[:24].rstrip('-')
         
         # Add unique 4-character suffix to prevent duplicates
         unique_suffix = uuid.uuid4().hex[:4]
@@ -91,7 +163,7 @@ class CloudflareService:
     async def deploy_to_pages(
         self, 
         website_id: str, 
-        html_content: str, 
+        html_content: Union[str, bytes], 
         subdomain: str,
         user_id: Optional[str] = None
     ) -> DeploymentResult:
@@ -104,7 +176,8 @@ class CloudflareService:
         
         Args:
             website_id: Unique website identifier
-            html_content: The HTML content to deploy
+            html_content: The HTML content to deploy (str, or UTF-8 bytes
+                already encoded by the caller)
             subdomain: The subdomain for the site (used as branch name)
             user_id: Owner user ID
         
@@ -112,12 +185,8 @@ class CloudflareService:
             DeploymentResult with deployment status and URL
         """
         import os
-        import shutil
         import tempfile
         import asyncio
-        from app.core.config import get_settings
-        
-        settings = get_settings()
         
         if not self.is_configured():
             local_url = f"http://localhost:8000/sites/{subdomain}"
@@ -132,16 +201,15 @@ class CloudflareService:
         # Create a temporary directory for the site content
         with tempfile.TemporaryDirectory() as temp_dir:
             try:
-                # Write index.html
+                # Write index.html as raw bytes (encode only if given a str)
+                html_bytes = html_content.encode("utf-8") if isinstance(html_content, str) else html_content
                 site_path = os.path.join(temp_dir, "index.html")
-                with open(site_path, "w", encoding="utf-8") as f:
-                    f.write(html_content)
+                with open(site_path, "wb") as f:
+                    f.write(html_bytes)
                 
                 # MEDIUM-006: Use config-based credentials (already from env vars)
                 # Subprocess inherits env from config, no plaintext secrets in logs
-                env = os.environ.copy()
-                env["CLOUDFLARE_ACCOUNT_ID"] = self.account_id
-                env["CLOUDFLARE_API_TOKEN"] = self.api_token  # From settings, not logged
+                env = {**os.environ, **self._wrangler_credentials}  # From settings, not logged
                 
                 # Construct wrangler command
                 # Deploy to a branch named after the subdomain
@@ -152,7 +220,7 @@ class CloudflareService:
                     "--commit-dirty=true"
                 ]
                 
-                print(f"Executing deployment: {' '.join(cmd)}")
+                logger.info("Executing deployment: %s", " ".join(cmd))
                 
                 # Run wrangler
                 process = await asyncio.create_subprocess_exec(
@@ -168,9 +236,9 @@ class CloudflareService:
                 stdout_str = stdout.decode()
                 stderr_str = stderr.decode()
                 
-                print(f"Wrangler output: {stdout_str}")
+                logger.info("Wrangler output: %s", stdout_str)
                 if stderr_str:
-                    print(f"Wrangler stderr: {stderr_str}")
+                    logger.warning("Wrangler stderr: %s", stderr_str)
                 
                 if process.returncode == 0:
                     # Parse the URL from output or construct it
@@ -189,6 +257,10 @@ class CloudflareService:
                     
                     deployment_id = f"cf-{subdomain}-{int(datetime.now().timestamp())}"
                     
+                    # Redeploys replace content at a live URL; drop just its cached copies
+                    if self.zone_id and live_url.endswith(f".{self.base_domain}"):
+                        await self.purge_urls([live_url, f"{live_url}/", f"{live_url}/index.html"])
+                    
                     return DeploymentResult(
                         success=True,
                         deployment_id=deployment_id,
@@ -213,6 +285,36 @@ class CloudflareService:
                     message=f"Deployment error: {str(e)}"
                 )
     
+    async def purge_urls(self, urls: list[str], zone_id: Optional[str] = None) -> bool:
+        """
+        Purge specific URLs from the Cloudflare cache (not the whole zone).
+        
+        Args:
+            urls: Exact URLs to purge
+            zone_id: Zone the URLs belong to (defaults to the configured zone)
+        
+        Returns:
+            True if Cloudflare accepted the purge
+        """
+        zone_id = zone_id or self.zone_id
+        if not self.is_configured() or not zone_id or not urls:
+            return False
+        
+        try:
+            response = await self._request(
+                "POST",
+                f"/zones/{zone_id}/purge_cache",
+                json={"files": urls}
+            )
+            if response.status_code != 200:
+                logger.error("Cache purge failed: HTTP %s", response.status_code)
+                return False
+            return True
+            
+        except Exception:
+            logger.exception("Error purging cache zone=%s", zone_id)
+            return False
+    
     async def delete_deployment(self, subdomain: str) -> bool:
         """
         Delete a deployment (not easily supported via API needed for unpublish).
@@ -221,6 +323,17 @@ class CloudflareService:
         """
         return True
     
+    def _cache_status(self, deployment_id: str, status: dict, now: float):
+        """Remember a fetched deployment status (longer for finished builds)."""
+        if len(self._status_cache) >= _STATUS_CACHE_MAX_ENTRIES:
+            for key in [k for k, v in self._status_cache.items() if now >= v[0]]:
+                self._status_cache.pop(key, None)
+            if len(self._status_cache) >= _STATUS_CACHE_MAX_ENTRIES:
+                self._status_cache.clear()
+        
+        ttl = _TERMINAL_STATUS_CACHE_TTL if status["status"] in _TERMINAL_STATUSES else _STATUS_CACHE_TTL
+        self._status_cache[deployment_id] = (now + ttl, status)
+    
     async def get_deployment_status(self, deployment_id: str) -> dict:
         """
         Get the status of a deployment.
@@ -234,21 +347,30 @@ class CloudflareService:
         if not self.is_configured():
             return {"status": "unknown", "message": "Cloudflare not configured"}
         
+        now = time.monotonic()
+        cached = self._status_cache.get(deployment_id)
+        if cached and now < cached[0]:
+            return dict(cached[1])
+        
         try:
             url = f"{self.api_base}/accounts/{self.account_id}/pages/projects/{self.pages_project}/deployments/{deployment_id}"
             
-            response = await self.client.get(url)
+            response = await self._request("GET", url)
+            body = response.json()  # Parsed once for both branches
             
             if response.status_code == 200:
-                data = response.json().get("result", {})
-                return {
+                data = body.get("result") or {}
+                status = {
                     "status": data.get("latest_stage", {}).get("status", "unknown"),
                     "url": data.get("url"),
                     "created_at": data.get("created_on"),
                     "ssl_status": "active" if data.get("url", "").startswith("https") else "pending"
                 }
+                self._cache_status(deployment_id, status, now)
+                return dict(status)
             
-            return {"status": "error", "message": "Failed to get deployment status"}
+            error_msg = (body.get("errors") or [{"message": "Failed to get deployment status"}])[0].get("message")
+            return {"status": "error", "message": error_msg}
             
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -275,9 +397,6 @@ class CloudflareService:
         import os
         import tempfile
         import asyncio
-        from app.core.config import get_settings
-        
-        settings = get_settings()
         
         if not self.is_configured():
             local_url = f"http://localhost:8000/sites/{subdomain}"
@@ -295,15 +414,13 @@ class CloudflareService:
                 # Write all HTML files
                 for filename, content in pages.items():
                     file_path = os.path.join(temp_dir, filename)
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(content)
+                    with open(file_path, "wb") as f:
+                        f.write(content.encode("utf-8"))
                 
-                print(f"Deploying multi-page site with files: {list(pages.keys())}")
+                logger.info("Deploying multi-page site with files: %s", list(pages))
                 
                 # Prepare environment for wrangler
-                env = os.environ.copy()
-                env["CLOUDFLARE_ACCOUNT_ID"] = self.account_id
-                env["CLOUDFLARE_API_TOKEN"] = self.api_token
+                env = {**os.environ, **self._wrangler_credentials}
                 
                 # Construct wrangler command
                 cmd = [
@@ -313,7 +430,7 @@ class CloudflareService:
                     "--commit-dirty=true"
                 ]
                 
-                print(f"Executing deployment: {' '.join(cmd)}")
+                logger.info("Executing deployment: %s", " ".join(cmd))
                 
                 # Run wrangler
                 process = await asyncio.create_subprocess_exec(
@@ -329,9 +446,9 @@ class CloudflareService:
                 stdout_str = stdout.decode()
                 stderr_str = stderr.decode()
                 
-                print(f"Wrangler output: {stdout_str}")
+                logger.info("Wrangler output: %s", stdout_str)
                 if stderr_str:
-                    print(f"Wrangler stderr: {stderr_str}")
+                    logger.warning("Wrangler stderr: %s", stderr_str)
                 
                 if process.returncode == 0:
                     project_subdomain = self.pages_project
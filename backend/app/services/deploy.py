@@ -5,11 +5,12 @@ Handles publishing websites to Cloudflare Pages with local fallback.
 
 import os
 import json
+import asyncio
 import shutil
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 from pydantic import BaseModel
 
 from app.core.config import get_settings
@@ -87,6 +88,23 @@ def save_published_sites(sites: dict):
     SITES_FILE.write_text(json.dumps(sites, indent=2))
 
 
+async def _deploy_and_archive(deploy, website_id: str, html_content: Union[str, bytes]):
+    """
+    Await a Cloudflare deploy while archiving the HTML to R2 concurrently.
+    
+    The two calls hit independent endpoints, so latency is max(deploy, archive)
+    instead of their sum. upload_html handles its own errors (and is a no-op
+    when R2 isn't configured), so a failed archive never fails the deploy.
+    
+    Returns:
+        The deploy's DeploymentResult
+    """
+    from app.services.r2_service import r2_service
+    
+    result, _ = await asyncio.gather(deploy, r2_service.upload_html(html_content, website_id))
+    return result
+
+
 async def publish_website_cloudflare(
     website_id: str,
     html_content: str,
@@ -149,11 +167,15 @@ Sitemap: {site_url}/sitemap.xml"""
             "sitemap.xml": sitemap_xml
         }
 
-        result = await cloudflare_service.deploy_multipage_to_pages(
-            website_id=website_id,
-            pages=files,
-            subdomain=subdomain,
-            user_id=user_id
+        result = await _deploy_and_archive(
+            cloudflare_service.deploy_multipage_to_pages(
+                website_id=website_id,
+                pages=files,
+                subdomain=subdomain,
+                user_id=user_id
+            ),
+            website_id,
+            html_content
         )
         
         if not result.success:
@@ -201,11 +223,15 @@ Sitemap: {site_url}/sitemap.xml"""
             "sitemap.xml": sitemap_xml
         }
 
-        result = await cloudflare_service.deploy_multipage_to_pages(
-            website_id=website_id,
-            pages=files,
-            subdomain=subdomain,
-            user_id=user_id
+        result = await _deploy_and_archive(
+            cloudflare_service.deploy_multipage_to_pages(
+                website_id=website_id,
+                pages=files,
+                subdomain=subdomain,
+                user_id=user_id
+            ),
+            website_id,
+            html_content
         )
         
         if result.success:
@@ -413,12 +439,19 @@ async def republish_website(
     site = sites[website_id]
     subdomain = site.get('subdomain')
     
+    # Encode once; the same bytes go to Cloudflare or the local fallback
+    html_bytes = html_content.encode("utf-8")
+    
     # Try Cloudflare republish
     if cloudflare_service.is_configured():
-        result = await cloudflare_service.deploy_to_pages(
-            website_id=website_id,
-            html_content=html_content,
-            subdomain=subdomain
+        result = await _deploy_and_archive(
+            cloudflare_service.deploy_to_pages(
+                website_id=website_id,
+                html_content=html_bytes,
+                subdomain=subdomain
+            ),
+            website_id,
+            html_bytes
         )
         
         if result.success:
@@ -432,7 +465,7 @@ async def republish_website(
     
     # Fallback to local update
     html_path = PUBLISHED_DIR / subdomain / "index.html"
-    html_path.write_text(html_content)
+    html_path.write_bytes(html_bytes)
     
     # Update published timestamp
     site['published_at'] = datetime.now().isoformat()
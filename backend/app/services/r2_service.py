@@ -3,15 +3,56 @@ R2 Storage Service
 Handles file uploads to Cloudflare R2 (S3-compatible storage).
 """
 
-import boto3
+import io
+import logging
+import gzip
+import hashlib
+import os
+import time
+import secrets
+import asyncio
+import functools
+import contextlib
+import aioboto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
-from typing import Optional
-from datetime import datetime
+from botocore.exceptions import ClientError
+from typing import Optional, Union
 import mimetypes
-import uuid
 
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+
+# One aioboto3 session per process; client construction is expensive
+_session = aioboto3.Session()
+
+# Uploads above 8 MiB go out as concurrent multipart PUTs
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _content_type_for_ext(ext: str, default: str) -> str:
+    """Content type for a file extension (memoized; the extension set is small)."""
+    return mimetypes.types_map.get(ext) or mimetypes.guess_type('x' + ext)[0] or default
+
+
+# [checked_at, "YYYYMMDD"] - the UTC date string is reformatted at most once a minute
+_DATE_CACHE = [0.0, ""]
+
+
+def _today() -> str:
+    """Current UTC date as YYYYMMDD, cached for up to 60 seconds."""
+    now = time.time()
+    if now - _DATE_CACHE[0] > 60:
+        _DATE_CACHE[:] = [now, time.strftime("%Y%m%d", time.gmtime(now))]
+    return _DATE_CACHE[1]
+
 
 class R2Service:
     """Service for uploading files to Cloudflare R2 storage."""
@@ -22,43 +63,59 @@ class R2Service:
         self.secret_key = settings.cloudflare_r2_secret_key
         self.bucket = settings.cloudflare_r2_bucket
         self.endpoint = settings.cloudflare_r2_endpoint
+        # Settings don't change at runtime; evaluate once
+        self._configured = bool(
+            self.access_key and 
+            self.secret_key and 
+            self.bucket and 
+            self.endpoint and
+            self.access_key != "" and
+            self.secret_key != ""
+        )
+        # Async S3 client, opened once (on startup or first use) and shared
         self._client = None
+        self._client_stack: Optional[contextlib.AsyncExitStack] = None
+        self._client_lock = asyncio.Lock()
     
-    @property
-    def client(self):
-        """Get or create S3 client for R2."""
-        if self._client is None:
-            if not self.is_configured():
-                return None
-            
-            self._client = boto3.client(
+    async def start(self):
+        """Open the shared async S3 client (call on app startup)."""
+        async with self._client_lock:
+            if self._client is not None or not self.is_configured():
+                return
+            stack = contextlib.AsyncExitStack()
+            self._client = await stack.enter_async_context(_session.client(
                 's3',
                 endpoint_url=self.endpoint,
                 aws_access_key_id=self.access_key,
                 aws_secret_access_key=self.secret_key,
                 config=Config(
                     signature_version='s3v4',
-                    s3={'addressing_style': 'path'}
+                    s3={'addressing_style': 'path'},
+                    max_pool_connections=100
                 )
-            )
+            ))
+            self._client_stack = stack
+    
+    async def close(self):
+        """Close the shared S3 client and its connection pool (call on app shutdown)."""
+        if self._client_stack:
+            await self._client_stack.aclose()
+        self._client = None
+        self._client_stack = None
+    
+    async def get_client(self):
+        """Get the async S3 client for R2, opening it if startup hasn't."""
+        if self._client is None:
+            await self.start()
         return self._client
     
     def is_configured(self) -> bool:
         """Check if R2 is properly configured."""
-        return bool(
-            self.access_key and 
-            self.secret_key and 
-            self.bucket and 
-            self.endpoint and
-            self.access_key != "" and
-            self.secret_key != ""
-        )
+        return self._configured
     
     def _generate_key(self, prefix: str, filename: str) -> str:
         """Generate a unique storage key."""
-        timestamp = datetime.utcnow().strftime("%Y%m%d")
-        unique_id = uuid.uuid4().hex[:8]
-        return f"{prefix}/{timestamp}/{unique_id}_{filename}"
+        return f"{prefix}/{_today()}/{secrets.token_hex(4)}_{filename}"
     
     async def upload_audio(
         self, 
@@ -83,13 +140,15 @@ class R2Service:
         
         try:
             key = self._generate_key(f"audio/{user_id}", filename)
-            content_type = mimetypes.guess_type(filename)[0] or 'audio/webm'
+            content_type = _content_type_for_ext(os.path.splitext(filename)[1].lower(), 'audio/webm')
             
-            self.client.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=audio_data,
-                ContentType=content_type
+            client = await self.get_client()
+            await client.upload_fileobj(
+                io.BytesIO(audio_data),
+                self.bucket,
+                key,
+                ExtraArgs={'ContentType': content_type},
+                Config=_TRANSFER_CONFIG
             )
             
             # Generate public URL
@@ -98,8 +157,8 @@ class R2Service:
             
             return public_url
             
-        except Exception as e:
-            print(f"Error uploading audio to R2: {e}")
+        except Exception:
+            logger.exception("Error uploading audio to R2 key=%s", key)
             return None
     
     async def upload_asset(
@@ -124,33 +183,70 @@ class R2Service:
         
         try:
             key = self._generate_key(f"assets/{website_id}", filename)
-            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            content_type = _content_type_for_ext(
+                os.path.splitext(filename)[1].lower(), 'application/octet-stream'
+            )
             
-            self.client.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=file_data,
-                ContentType=content_type
+            client = await self.get_client()
+            await client.upload_fileobj(
+                io.BytesIO(file_data),
+                self.bucket,
+                key,
+                ExtraArgs={'ContentType': content_type},
+                Config=_TRANSFER_CONFIG
             )
             
             public_url = f"{self.endpoint}/{self.bucket}/{key}"
             
             return public_url
             
-        except Exception as e:
-            print(f"Error uploading asset to R2: {e}")
+        except Exception:
+            logger.exception("Error uploading asset to R2 key=%s", key)
+            return None
+    
+    async def upload_assets_batch(
+        self, 
+        website_id: str, 
+        items: list[tuple[str, bytes]]
+    ) -> list[Optional[str]]:
+        """
+        Upload several website assets concurrently.
+        
+        Args:
+            website_id: Website ID for organizing storage
+            items: (filename, file bytes) pairs
+        
+        Returns:
+            Public URL (or None if that upload failed) for each item, in order
+        """
+        # Keep in-flight PUTs within the client's connection pool
+        semaphore = asyncio.Semaphore(32)
+        
+        async def upload_one(filename: str, file_data: bytes) -> Optional[str]:
+            async with semaphore:
+                return await self.upload_asset(file_data, website_id, filename)
+        
+        return await asyncio.gather(*(upload_one(f, d) for f, d in items))
+    
+    async def _stored_content_hash(self, key: str) -> Optional[str]:
+        """Content hash recorded on an existing object (None if missing or untagged)."""
+        try:
+            client = await self.get_client()
+            head = await client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
             return None
+        return head.get('Metadata', {}).get('content-hash')
     
     async def upload_html(
         self, 
-        html_content: str, 
+        html_content: Union[str, bytes], 
         website_id: str
     ) -> Optional[str]:
         """
         Upload HTML content to R2 as a backup/archive.
         
         Args:
-            html_content: HTML string content
+            html_content: HTML content (str, or UTF-8 bytes already encoded by the caller)
             website_id: Website ID
         
         Returns:
@@ -161,22 +257,43 @@ class R2Service:
         
         try:
             key = f"websites/{website_id}/index.html"
+            html_bytes = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+            public_url = f"{self.endpoint}/{self.bucket}/{key}"
+            
+            # Skip the upload when the archived copy already has this content
+            digest = hashlib.sha256(html_bytes).hexdigest()
+            if await self._stored_content_hash(key) == digest:
+                return public_url
             
-            self.client.put_object(
+            # HTML compresses 5-10x; clients decompress via Content-Encoding
+            compressed = await asyncio.to_thread(gzip.compress, html_bytes, compresslevel=6)
+            
+            client = await self.get_client()
+            await client.put_object(
                 Bucket=self.bucket,
                 Key=key,
-                Body=html_content.encode('utf-8'),
-                ContentType='text/html; charset=utf-8'
+                Body=compressed,
+                ContentType='text/html; charset=utf-8',
+                ContentEncoding='gzip',
+                Metadata={'content-hash': digest}
             )
             
-            public_url = f"{self.endpoint}/{self.bucket}/{key}"
-            
             return public_url
             
-        except Exception as e:
-            print(f"Error uploading HTML to R2: {e}")
+        except Exception:
+            logger.exception("Error uploading HTML to R2 key=%s", key)
             return None
     
+    async def _list_keys(self, prefix: str) -> list[str]:
+        """List all object keys under a prefix across every result page."""
+        client = await self.get_client()
+        paginator = client.get_paginator('list_objects_v2')
+        return [
+            obj['Key']
+            async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+            for obj in page.get('Contents', [])
+        ]
+    
     async def delete_assets(self, website_id: str) -> bool:
         """
         Delete all assets for a website.
@@ -193,27 +310,27 @@ class R2Service:
         try:
             prefix = f"assets/{website_id}/"
             
-            # List all objects with prefix
-            response = self.client.list_objects_v2(
-                Bucket=self.bucket,
-                Prefix=prefix
-            )
-            
-            # Delete each object
-            objects_to_delete = response.get('Contents', [])
+            # List every page of objects under the prefix
+            keys = await self._list_keys(prefix)
             
-            if objects_to_delete:
-                delete_keys = [{'Key': obj['Key']} for obj in objects_to_delete]
-                
-                self.client.delete_objects(
+            # delete_objects takes at most 1000 keys; send the batches concurrently
+            batches = [keys[i:i + 1000] for i in range(0, len(keys), 1000)]
+            client = await self.get_client()
+            await asyncio.gather(*[
+                client.delete_objects(
                     Bucket=self.bucket,
-                    Delete={'Objects': delete_keys}
+                    Delete={
+                        'Objects': [{'Key': key} for key in batch],
+                        'Quiet': True
+                    }
                 )
+                for batch in batches
+            ])
             
             return True
             
-        except Exception as e:
-            print(f"Error deleting assets from R2: {e}")
+        except Exception:
+            logger.exception("Error deleting assets from R2 prefix=%s", prefix)
             return False
     
     async def get_signed_url(
@@ -235,15 +352,16 @@ class R2Service:
             return None
         
         try:
-            url = self.client.generate_presigned_url(
+            client = await self.get_client()
+            url = await client.generate_presigned_url(
                 'get_object',
                 Params={'Bucket': self.bucket, 'Key': key},
                 ExpiresIn=expires_in
             )
             return url
             
-        except Exception as e:
-            print(f"Error generating signed URL: {e}")
+        except Exception:
+            logger.exception("Error generating signed URL key=%s", key)
             return None
 
 
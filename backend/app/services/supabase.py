@@ -4,30 +4,161 @@ Handles all Supabase database operations with proper error handling.
 """
 
 import os
-from typing import Optional, Dict, Any, List
+import time
+import logging
+import asyncio
+import weakref
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Final, Mapping
 from datetime import datetime
-from supabase import create_client, Client
+import httpx
+import orjson
+import redis.asyncio as aioredis
+import zstandard
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_TIMEOUT
+from supabase import create_client, Client, acreate_client, AsyncClient
+from supabase.lib.client_options import AsyncClientOptions, SyncClientOptions
+from realtime import RealtimeSubscribeStates
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
 
-# Credit costs for actions
-CREDIT_COSTS = {
+
+# Credit costs for actions (read-only)
+CREDIT_COSTS: Final[Mapping[str, int]] = MappingProxyType({
     "generate": 10,
     "voice_generate": 15,
     "edit": 2,
     "redesign": 20,
     "publish": 30,  # Increased from 5 to create paywall (signup bonus = 25)
+})
+
+# Bound once; credit checks run on every billed request
+_cost_of = CREDIT_COSTS.get
+
+# Read-through Redis cache for rows looked up on nearly every request.
+# Entries are dropped on write and on Realtime row changes (see
+# start_cache_invalidator); the TTL stays short as a backstop
+CACHE_TTL_SECONDS = 300
+
+# Realtime-invalidated tables: table -> (key column, cache key prefix)
+_INVALIDATED_TABLES = {
+    "websites": ("id", "website:"),
+    "credits": ("user_id", "credits:"),
+    "users": ("auth_id", "user:"),
 }
 
+# Re-subscribe backoff for the Realtime invalidation channel
+_INVALIDATOR_RETRY_INITIAL = 1  # seconds
+_INVALIDATOR_RETRY_MAX = 60  # seconds
+
+# List views skip the html/business_json/layout_json payloads; full rows
+# come from get_website / get_website_version
+WEBSITE_LIST_COLUMNS = (
+    "id,owner_id,status,subdomain,live_url,description,language,"
+    "source_type,published_at,created_at,updated_at"
+)
+VERSION_LIST_COLUMNS = "id,website_id,version,created_at,created_by"
+
+# Cached website rows leave out html; callers that need it read it from the DB
+WEBSITE_CACHE_COLUMNS = WEBSITE_LIST_COLUMNS + ",business_json,layout_json"
+
+# After a Redis error, cache reads/writes are skipped for this long so an
+# outage doesn't add the socket timeout to every request
+REDIS_RETRY_AFTER_SECONDS = 5
+
+# Waitlist signups are buffered and written in multi-row INSERTs
+WAITLIST_BATCH_SIZE = 50
+WAITLIST_FLUSH_INTERVAL = 0.1  # seconds
+
+# The landing-page waitlist counter: exact COUNT at most once a minute,
+# bumped in place as signups land
+WAITLIST_COUNT_KEY = "waitlist:count"
+WAITLIST_COUNT_TTL_SECONDS = 60
+
+# INCRBY only when the key exists, so a bump never creates a TTL-less counter
+_INCR_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+# Version snapshots are stored zstd-compressed (see migrations/015);
+# the codec objects are reused rather than rebuilt per call
+_ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3)
+_ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor()
+
+
+def _compress_html(html: str) -> str:
+    """Compress HTML for a BYTEA column, hex-encoded the way PostgREST expects."""
+    return "\\x" + _ZSTD_COMPRESSOR.compress(html.encode("utf-8")).hex()
+
+
+def _inflate_html(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace a row's html_zstd with the decompressed html (in place)."""
+    compressed = row.pop("html_zstd", None)
+    if compressed:
+        row["html"] = _ZSTD_DECOMPRESSOR.decompress(bytes.fromhex(compressed[2:])).decode("utf-8")
+    return row
+
+
+class _OrjsonBodyMixin:
+    """Encode JSON request bodies with orjson instead of the stdlib encoder."""
+    
+    def build_request(self, method, url, *, json=None, content=None, headers=None, **kwargs):
+        if json is not None and content is None:
+            content = orjson.dumps(json, option=orjson.OPT_NON_STR_KEYS)
+            headers = httpx.Headers(headers)
+            headers["Content-Type"] = "application/json"
+            json = None
+        return super().build_request(method, url, json=json, content=content, headers=headers, **kwargs)
+
+
+class _OrjsonAsyncClient(_OrjsonBodyMixin, httpx.AsyncClient):
+    pass
+
+
+class _OrjsonClient(_OrjsonBodyMixin, httpx.Client):
+    pass
+
 
 class SupabaseService:
-    """Service for interacting with Supabase database."""
+    """
+    Service for interacting with Supabase database.
+    
+    Queries go through the async PostgREST client so they never block the
+    event loop; the sync client remains for callers outside async code.
+    """
     
     def __init__(self):
         settings = get_settings()
         self.url = settings.supabase_url
         self.key = settings.supabase_service_key
+        self.redis_url = settings.redis_url
+        # Settings don't change at runtime; evaluate once
+        self._configured = bool(
+            self.url and self.key and 
+            self.url != "https://your-project.supabase.co" and
+            self.key != "your-service-role-key-here"
+        )
         self._client: Optional[Client] = None
+        # One async client per event loop: its pooled connections are bound to
+        # the loop that opened them (Celery tasks run on their own loops)
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = \
+            weakref.WeakKeyDictionary()
+        self._redis_down_until = 0.0
+        # Pending waitlist rows, keyed by contact so a burst of repeat
+        # submissions shares one INSERT; the flusher starts on first use
+        self._waitlist_queue: Optional[asyncio.Queue] = None
+        self._waitlist_pending: Dict[str, asyncio.Future] = {}
+        self._waitlist_flush_task: Optional[asyncio.Task] = None
+        # Realtime subscription that evicts cached rows changed elsewhere
+        self._invalidator_task: Optional[asyncio.Task] = None
+        self._invalidation_tasks: set = set()
     
     @property
     def client(self) -> Client:
@@ -35,18 +166,175 @@ class SupabaseService:
         if not self._client:
             if not self.url or not self.key:
                 raise ValueError("Supabase credentials not configured")
-            self._client = create_client(self.url, self.key)
+            self._client = create_client(
+                self.url,
+                self.key,
+                options=SyncClientOptions(httpx_client=_OrjsonClient(
+                    timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+                    follow_redirects=True
+                ))
+            )
         return self._client
     
     def get_client(self) -> Client:
         """Get Supabase client (alias for compatibility)."""
         return self.client
     
+    async def get_async_client(self) -> AsyncClient:
+        """Get or create the async Supabase client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        async_client = self._async_clients.get(loop)
+        if async_client is None:
+            if not self.url or not self.key:
+                raise ValueError("Supabase credentials not configured")
+            async_client = await acreate_client(
+                self.url,
+                self.key,
+                # Keep-alive HTTP/2 pool: requests multiplex over warm connections
+                options=AsyncClientOptions(httpx_client=_OrjsonAsyncClient(
+                    timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+                    follow_redirects=True,
+                    http2=True,
+                    limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+                ))
+            )
+            self._async_clients[loop] = async_client
+        return async_client
+    
+    async def aclose(self):
+        """Close the running loop's HTTP, Realtime and Redis connections (call on app shutdown)."""
+        if self._invalidator_task is not None:
+            self._invalidator_task.cancel()
+            self._invalidator_task = None
+        loop = asyncio.get_running_loop()
+        async_client = self._async_clients.pop(loop, None)
+        if async_client is not None:
+            try:
+                await async_client.remove_all_channels()
+            except Exception as e:
+                print(f"Error closing Realtime channels: {e}")
+            if async_client.options.httpx_client is not None:
+                await async_client.options.httpx_client.aclose()
+        redis_client = self._redis_clients.pop(loop, None)
+        if redis_client is not None:
+            await redis_client.aclose()
+    
+    def _get_redis(self) -> aioredis.Redis:
+        """Get the Redis cache client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        redis_client = self._redis_clients.get(loop)
+        if redis_client is None:
+            redis_client = aioredis.Redis.from_url(
+                self.redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5
+            )
+            self._redis_clients[loop] = redis_client
+        return redis_client
+    
+    def _redis_available(self) -> bool:
+        """False while backing off after a Redis error."""
+        return time.monotonic() >= self._redis_down_until
+    
+    def _redis_failed(self, action: str, key: str, error: Exception):
+        """Log a Redis error and skip cache reads/writes for a while."""
+        if self._redis_available():
+            print(f"Cache {action} failed for {key}: {error}; bypassing cache for {REDIS_RETRY_AFTER_SECONDS}s")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+    
+    async def _cache_get(self, key: str) -> Optional[Any]:
+        """Read a cached row (None on miss or if Redis is unavailable)."""
+        if not self._redis_available():
+            return None
+        try:
+            cached = await self._get_redis().get(key)
+            return orjson.loads(cached) if cached else None
+        except Exception as e:
+            self._redis_failed("read", key, e)
+            return None
+    
+    async def _cache_set(self, key: str, row: Any, ttl: int = CACHE_TTL_SECONDS):
+        """Cache a row for ttl seconds (best effort)."""
+        if not self._redis_available():
+            return
+        try:
+            await self._get_redis().set(key, orjson.dumps(row), ex=ttl)
+        except Exception as e:
+            self._redis_failed("write", key, e)
+    
+    async def _cache_delete(self, *keys: str):
+        """Invalidate cached rows after a write (best effort; tried even while backing off)."""
+        try:
+            await self._get_redis().delete(*keys)
+        except Exception as e:
+            print(f"Cache invalidation failed for {keys}: {e}")
+    
+    def start_cache_invalidator(self):
+        """Start the Realtime cache invalidator in the background (call on app startup)."""
+        if not self._configured:
+            return
+        if self._invalidator_task is None or self._invalidator_task.done():
+            self._invalidator_task = asyncio.create_task(self._run_cache_invalidator())
+    
+    async def _run_cache_invalidator(self):
+        """Keep a subscription to row changes on the cached tables, re-subscribing on failure."""
+        delay = _INVALIDATOR_RETRY_INITIAL
+        while True:
+            lost = asyncio.Event()
+            
+            def on_state(state: RealtimeSubscribeStates, error: Optional[Exception] = None):
+                nonlocal delay
+                if state == RealtimeSubscribeStates.SUBSCRIBED:
+                    logger.info("Cache invalidator subscribed")
+                    delay = _INVALIDATOR_RETRY_INITIAL
+                else:
+                    logger.warning("Cache invalidator channel %s: %s", state.value, error)
+                    lost.set()
+            
+            client = None
+            channel = None
+            try:
+                client = await self.get_async_client()
+                channel = client.channel("cache-invalidator")
+                for table in _INVALIDATED_TABLES:
+                    channel.on_postgres_changes(
+                        "*",
+                        schema="public",
+                        table=table,
+                        callback=self._on_row_change
+                    )
+                await channel.subscribe(on_state)
+                await lost.wait()
+            except Exception:
+                logger.exception("Cache invalidator failed to subscribe")
+            
+            if channel is not None:
+                try:
+                    await client.remove_channel(channel)
+                except Exception:
+                    logger.exception("Error removing cache invalidator channel")
+            
+            logger.info("Re-subscribing cache invalidator in %ss", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _INVALIDATOR_RETRY_MAX)
+    
+    def _on_row_change(self, payload: Dict[str, Any]):
+        """Drop the cache entries for a changed row (Realtime callback)."""
+        data = payload["data"]
+        column, prefix = _INVALIDATED_TABLES[data["table"]]
+        keys = {
+            f"{prefix}{row[column]}"
+            for row in (data.get("record"), data.get("old_record"))
+            if row and row.get(column)
+        }
+        if keys:
+            task = asyncio.create_task(self._cache_delete(*keys))
+            self._invalidation_tasks.add(task)
+            task.add_done_callback(self._invalidation_tasks.discard)
+    
     def is_configured(self) -> bool:
         """Check if Supabase is properly configured."""
-        return bool(self.url and self.key and 
-                   self.url != "https://your-project.supabase.co" and
-                   self.key != "your-service-role-key-here")
+        return self._configured
     
     # ========================================
     # WAITLIST METHODS (Existing)
@@ -62,48 +350,137 @@ class SupabaseService:
         user_agent: Optional[str] = None
     ) -> Dict[str, Any]:
         """Add a new waitlist entry to Supabase."""
-        if not self.is_configured():
+        if not self._configured:
             raise ValueError("Supabase not configured")
         
+        # Same contact already queued: wait on that insert instead of adding a row
+        pending = self._waitlist_pending.get(contact)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
         data = {
             "contact": contact,
             "contact_type": contact_type,
             "business_description": business_description,
             "language": language,
             "ip_address": ip_address,
-            "user_agent": user_agent,
-            "created_at": datetime.utcnow().isoformat()
+            "user_agent": user_agent
         }
         
-        response = self.client.table("waitlist").insert(data).execute()
+        if self._waitlist_flush_task is None or self._waitlist_flush_task.done():
+            self._waitlist_queue = asyncio.Queue()
+            self._waitlist_flush_task = asyncio.create_task(self._run_waitlist_flusher())
         
-        if response.data:
-            return response.data[0]
-        else:
-            raise Exception("Failed to insert waitlist entry")
+        future = asyncio.get_running_loop().create_future()
+        self._waitlist_pending[contact] = future
+        self._waitlist_queue.put_nowait((data, future))
+        return await asyncio.shield(future)
+    
+    async def _insert_waitlist_batch(self, batch: List[tuple]):
+        """Insert queued waitlist rows in one request and resolve each writer's future."""
+        client = None
+        try:
+            client = await self.get_async_client()
+            response = await client.table("waitlist")\
+                .insert([data for data, _ in batch])\
+                .execute()
+            rows = response.data or []
+            if len(rows) != len(batch):
+                raise Exception("Failed to insert waitlist entry")
+            results = list(zip(batch, rows))
+        except Exception as e:
+            if len(batch) == 1 or client is None:
+                results = [(item, e) for item in batch]
+            else:
+                # One bad row fails the whole INSERT; retry row by row so the
+                # rest of the batch still lands
+                print(f"Batched waitlist insert failed, retrying individually: {e}")
+                results = []
+                for item in batch:
+                    try:
+                        response = await client.table("waitlist").insert(item[0]).execute()
+                        if not response.data:
+                            raise Exception("Failed to insert waitlist entry")
+                        results.append((item, response.data[0]))
+                    except Exception as row_error:
+                        results.append((item, row_error))
+        
+        inserted = sum(1 for _, result in results if not isinstance(result, Exception))
+        if inserted and self._redis_available():
+            try:
+                await self._get_redis().eval(_INCR_IF_EXISTS, 1, WAITLIST_COUNT_KEY, inserted)
+            except Exception as e:
+                self._redis_failed("update", WAITLIST_COUNT_KEY, e)
+        
+        for (data, future), result in results:
+            self._waitlist_pending.pop(data["contact"], None)
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    async def _run_waitlist_flusher(self):
+        """Drain queued waitlist rows every flush interval or batch size, whichever first."""
+        queue = self._waitlist_queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + WAITLIST_FLUSH_INTERVAL
+            
+            while len(batch) < WAITLIST_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            error: Optional[BaseException] = None
+            try:
+                await self._insert_waitlist_batch(batch)
+            except Exception as e:
+                print(f"Waitlist flush failed: {e}")
+                error = e
+            finally:
+                # Never leave a writer waiting on a future the flusher dropped
+                for data, future in batch:
+                    self._waitlist_pending.pop(data["contact"], None)
+                    if not future.done():
+                        future.set_exception(error or Exception("Failed to insert waitlist entry"))
     
     async def check_duplicate(self, contact: str) -> bool:
         """Check if contact already exists in waitlist."""
-        if not self.is_configured():
+        if not self._configured:
             return False
         
-        response = self.client.table("waitlist")\
-            .select("id")\
+        # HEAD request: only the count header comes back, no rows
+        client = await self.get_async_client()
+        response = await client.table("waitlist")\
+            .select("id", count="exact", head=True)\
             .eq("contact", contact)\
             .execute()
         
-        return len(response.data) > 0
+        return (response.count or 0) > 0
     
     async def get_waitlist_count(self) -> int:
-        """Get total number of waitlist entries."""
-        if not self.is_configured():
+        """Get total number of waitlist entries (cached for up to a minute)."""
+        if not self._configured:
             return 0
         
-        response = self.client.table("waitlist")\
-            .select("id", count="exact")\
+        cached = await self._cache_get(WAITLIST_COUNT_KEY)
+        if cached is not None:
+            return cached
+        
+        client = await self.get_async_client()
+        response = await client.table("waitlist")\
+            .select("id", count="exact", head=True)\
             .execute()
         
-        return response.count or 0
+        count = response.count or 0
+        await self._cache_set(WAITLIST_COUNT_KEY, count, ttl=WAITLIST_COUNT_TTL_SECONDS)
+        return count
     
     # ========================================
     # USER METHODS
@@ -111,16 +488,26 @@ class SupabaseService:
     
     async def get_user_by_auth_id(self, auth_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile by auth.users ID."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        response = self.client.table("users")\
+        cache_key = f"user:{auth_id}"
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        client = await self.get_async_client()
+        response = await client.table("users")\
             .select("*")\
             .eq("auth_id", auth_id)\
+            .limit(1)\
+            .maybe_single()\
             .execute()
         
-        if response.data and len(response.data) > 0:
-            return response.data[0]
+        # maybe_single() yields no response at all when the row is missing
+        if response:
+            await self._cache_set(cache_key, response.data)
+            return response.data
         return None
     
     async def create_user_profile(
@@ -130,14 +517,9 @@ class SupabaseService:
         metadata: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Create a user profile (if trigger didn't create it)."""
-        if not self.is_configured():
+        if not self._configured:
             raise ValueError("Supabase not configured")
         
-        # Check if user already exists
-        existing = await self.get_user_by_auth_id(auth_id)
-        if existing:
-            return existing
-        
         data = {
             "auth_id": auth_id,
             "email": email,
@@ -145,12 +527,21 @@ class SupabaseService:
             "avatar_url": metadata.get("avatar_url") if metadata else None,
         }
         
-        response = self.client.table("users").insert(data).execute()
+        # INSERT ... ON CONFLICT (auth_id) DO NOTHING: one round-trip for new
+        # users; an existing profile is left as is and no row comes back
+        client = await self.get_async_client()
+        response = await client.table("users")\
+            .upsert(data, on_conflict="auth_id", ignore_duplicates=True)\
+            .execute()
         
         if response.data:
+            await self._cache_set(f"user:{auth_id}", response.data[0])
             return response.data[0]
-        else:
-            raise Exception("Failed to create user profile")
+        
+        existing = await self.get_user_by_auth_id(auth_id)
+        if existing:
+            return existing
+        raise Exception("Failed to create user profile")
     
     async def update_user_profile(
         self, 
@@ -158,16 +549,17 @@ class SupabaseService:
         updates: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Update user profile."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        updates["updated_at"] = datetime.utcnow().isoformat()
-        
-        response = self.client.table("users")\
+        client = await self.get_async_client()
+        response = await client.table("users")\
             .update(updates)\
             .eq("auth_id", auth_id)\
             .execute()
         
+        await self._cache_delete(f"user:{auth_id}")
+        
         if response.data:
             return response.data[0]
         return None
@@ -191,7 +583,7 @@ class SupabaseService:
         Returns:
             Created website record
         """
-        if not self.is_configured():
+        if not self._configured:
             print("ERROR: Supabase not configured for create_website")
             raise ValueError("Supabase not configured")
         
@@ -209,7 +601,8 @@ class SupabaseService:
         print(f"Creating website in Supabase for owner: {owner_id}")
         
         try:
-            response = self.client.table("websites").insert(website_data).execute()
+            client = await self.get_async_client()
+            response = await client.table("websites").insert(website_data).execute()
             
             if response.data:
                 print(f"Website created successfully: {response.data[0].get('id')}")
@@ -224,7 +617,8 @@ class SupabaseService:
     async def get_website(
         self, 
         website_id: str, 
-        owner_id: Optional[str] = None
+        owner_id: Optional[str] = None,
+        include_html: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Get a website by ID, optionally filtered by owner.
@@ -232,24 +626,38 @@ class SupabaseService:
         Args:
             website_id: Website UUID
             owner_id: Optional owner filter for security
+            include_html: Fetch the html column too (always a DB read);
+                without it the row can come from the cache
         
         Returns:
             Website record or None
         """
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        query = self.client.table("websites")\
-            .select("*")\
+        # Cached by id without html; the owner filter is applied to the cached row
+        cache_key = f"website:{website_id}"
+        if not include_html:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                if owner_id and cached.get("owner_id") != owner_id:
+                    return None
+                return cached
+        
+        client = await self.get_async_client()
+        query = client.table("websites")\
+            .select("*" if include_html else WEBSITE_CACHE_COLUMNS)\
             .eq("id", website_id)
         
         if owner_id:
             query = query.eq("owner_id", owner_id)
         
-        response = query.execute()
+        response = await query.limit(1).maybe_single().execute()
         
-        if response.data and len(response.data) > 0:
-            return response.data[0]
+        if response:
+            row = response.data
+            await self._cache_set(cache_key, {k: v for k, v in row.items() if k != "html"})
+            return row
         return None
     
     async def get_user_websites(
@@ -267,13 +675,14 @@ class SupabaseService:
             limit: Maximum number of results
         
         Returns:
-            List of website records
+            List of website records (without html/business_json/layout_json)
         """
-        if not self.is_configured():
+        if not self._configured:
             return []
         
-        query = self.client.table("websites")\
-            .select("*")\
+        client = await self.get_async_client()
+        query = client.table("websites")\
+            .select(WEBSITE_LIST_COLUMNS)\
             .eq("owner_id", owner_id)\
             .order("created_at", desc=True)\
             .limit(limit)
@@ -281,7 +690,40 @@ class SupabaseService:
         if status:
             query = query.eq("status", status)
         
-        response = query.execute()
+        response = await query.execute()
+        
+        return response.data or []
+    
+    async def get_user_dashboard(
+        self, 
+        owner_id: str, 
+        status: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a user's websites with their latest deployment and version.
+        
+        One RPC (see migrations/013) instead of get_user_websites plus
+        get_deployment / get_website_versions per website. Rows omit the
+        html/layout payloads.
+        
+        Args:
+            owner_id: Owner's auth.users.id
+            status: Optional filter by status
+            limit: Maximum number of results
+        
+        Returns:
+            List of website records with deployment_id, deployment_live_url
+            and latest_version
+        """
+        if not self._configured:
+            return []
+        
+        client = await self.get_async_client()
+        response = await client.rpc(
+            "get_user_dashboard",
+            {"p_owner_id": owner_id, "p_status": status, "p_limit": limit}
+        ).execute()
         
         return response.data or []
     
@@ -302,17 +744,18 @@ class SupabaseService:
         Returns:
             Updated website or None
         """
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        updates["updated_at"] = datetime.utcnow().isoformat()
-        
-        response = self.client.table("websites")\
+        client = await self.get_async_client()
+        response = await client.table("websites")\
             .update(updates)\
             .eq("id", website_id)\
             .eq("owner_id", owner_id)\
             .execute()
         
+        await self._cache_delete(f"website:{website_id}")
+        
         if response.data:
             return response.data[0]
         return None
@@ -338,7 +781,7 @@ class SupabaseService:
         Returns:
             Updated website or None if not found/unauthorized
         """
-        if not self.is_configured():
+        if not self._configured:
             return None
         
         # Clean editor artifacts from HTML before saving
@@ -400,33 +843,36 @@ class SupabaseService:
             strip=True
         )
         
-        updates = {
-            "html": cleaned_html,
-            "updated_at": datetime.utcnow().isoformat()
-        }
+        updates = {"html": cleaned_html}
         
         # SECURITY: Only update if website belongs to owner
-        response = self.client.table("websites")\
+        client = await self.get_async_client()
+        response = await client.table("websites")\
             .update(updates)\
             .eq("id", website_id)\
             .eq("owner_id", owner_id)\
             .execute()
         
+        await self._cache_delete(f"website:{website_id}")
+        
         if response.data:
             return response.data[0]
         return None
     
     async def delete_website(self, website_id: str, owner_id: str) -> bool:
         """Delete a website (with owner verification)."""
-        if not self.is_configured():
+        if not self._configured:
             return False
         
-        response = self.client.table("websites")\
+        client = await self.get_async_client()
+        response = await client.table("websites")\
             .delete()\
             .eq("id", website_id)\
             .eq("owner_id", owner_id)\
             .execute()
         
+        await self._cache_delete(f"website:{website_id}")
+        
         return len(response.data) > 0 if response.data else False
     
     async def publish_website(
@@ -452,8 +898,7 @@ class SupabaseService:
             "status": "live",
             "subdomain": subdomain,
             "live_url": live_url,
-            "published_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
+            "published_at": datetime.utcnow().isoformat()
         }
         
         return await self.update_website(website_id, owner_id, updates)
@@ -483,26 +928,24 @@ class SupabaseService:
         Returns:
             Created version record
         """
-        if not self.is_configured():
+        if not self._configured:
             raise ValueError("Supabase not configured")
         
-        # Get next version number
-        versions = await self.get_website_versions(website_id, limit=1)
-        next_version = (versions[0]["version"] + 1) if versions else 1
-        
-        version_data = {
-            "website_id": website_id,
-            "version": next_version,
-            "html": html,
-            "business_json": business_json,
-            "layout_json": layout_json,
-            "created_by": created_by
-        }
-        
-        response = self.client.table("website_versions").insert(version_data).execute()
+        # Next version number is computed and inserted atomically (see migrations/011)
+        client = await self.get_async_client()
+        response = await client.rpc(
+            "create_website_version",
+            {
+                "p_website_id": website_id,
+                "p_html_zstd": _compress_html(html),
+                "p_business_json": business_json,
+                "p_layout_json": layout_json,
+                "p_created_by": created_by
+            }
+        ).execute()
         
         if response.data:
-            return response.data[0]
+            return _inflate_html(response.data[0])
         else:
             raise Exception("Failed to create website version")
     
@@ -511,12 +954,13 @@ class SupabaseService:
         website_id: str,
         limit: int = 10
     ) -> List[Dict[str, Any]]:
-        """Get version history for a website."""
-        if not self.is_configured():
+        """Get version history for a website (metadata only, no HTML snapshots)."""
+        if not self._configured:
             return []
         
-        response = self.client.table("website_versions")\
-            .select("*")\
+        client = await self.get_async_client()
+        response = await client.table("website_versions")\
+            .select(VERSION_LIST_COLUMNS)\
             .eq("website_id", website_id)\
             .order("version", desc=True)\
             .limit(limit)\
@@ -530,18 +974,19 @@ class SupabaseService:
         version: int
     ) -> Optional[Dict[str, Any]]:
         """Get a specific version of a website."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        response = self.client.table("website_versions")\
+        client = await self.get_async_client()
+        response = await client.table("website_versions")\
             .select("*")\
             .eq("website_id", website_id)\
             .eq("version", version)\
+            .limit(1)\
+            .maybe_single()\
             .execute()
         
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return None
+        return _inflate_html(response.data) if response else None
     
     # ========================================
     # CREDITS METHODS
@@ -557,15 +1002,22 @@ class SupabaseService:
         Returns:
             Credits record with balance info
         """
-        if not self.is_configured():
+        if not self._configured:
             return {"balance": 0, "user_id": user_id}
         
-        response = self.client.table("credits")\
+        cache_key = f"credits:{user_id}"
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        client = await self.get_async_client()
+        response = await client.table("credits")\
             .select("*")\
             .eq("user_id", user_id)\
             .execute()
         
         if response.data and len(response.data) > 0:
+            await self._cache_set(cache_key, response.data[0])
             return response.data[0]
         
         # Return default if no record (shouldn't happen with trigger)
@@ -583,7 +1035,7 @@ class SupabaseService:
             True if user has enough credits
         """
         credits = await self.get_user_credits(user_id)
-        cost = CREDIT_COSTS.get(action, 0)
+        cost = _cost_of(action, 0)
         
         return credits.get("balance", 0) >= cost
     
@@ -594,7 +1046,10 @@ class SupabaseService:
         description: Optional[str] = None
     ) -> bool:
         """
-        Deduct credits for an action.
+        Check and deduct credits for an action in one atomic call.
+        
+        Callers that charge up front don't need check_credits first; a
+        False return means the balance was insufficient (nothing deducted).
         
         Args:
             user_id: auth.users.id
@@ -604,16 +1059,18 @@ class SupabaseService:
         Returns:
             True if credits were deducted successfully
         """
-        if not self.is_configured():
+        if not self._configured:
             return True  # Allow in dev mode
         
-        cost = CREDIT_COSTS.get(action, 0)
+        cost = _cost_of(action, 0)
         if cost == 0:
             return True
         
         try:
-            # Use the database function for atomic deduction
-            response = self.client.rpc(
+            # Balance check, deduction and transaction log in one locked
+            # transaction (see migrations/012)
+            client = await self.get_async_client()
+            response = await client.rpc(
                 "deduct_credits",
                 {
                     "p_user_id": user_id,
@@ -623,36 +1080,15 @@ class SupabaseService:
                 }
             ).execute()
             
-            return response.data is True
+            result = response.data or {}
+            if result.get("ok"):
+                await self._cache_delete(f"credits:{user_id}")
+                return True
+            return False
             
         except Exception as e:
             print(f"Error deducting credits: {e}")
-            # Fallback to manual update
-            credits = await self.get_user_credits(user_id)
-            if credits.get("balance", 0) < cost:
-                return False
-            
-            new_balance = credits["balance"] - cost
-            
-            self.client.table("credits")\
-                .update({
-                    "balance": new_balance,
-                    "lifetime_spent": credits.get("lifetime_spent", 0) + cost,
-                    "updated_at": datetime.utcnow().isoformat()
-                })\
-                .eq("user_id", user_id)\
-                .execute()
-            
-            # Log transaction
-            self.client.table("credit_transactions").insert({
-                "user_id": user_id,
-                "amount": -cost,
-                "balance_after": new_balance,
-                "action": action,
-                "description": description or f"Used for {action}"
-            }).execute()
-            
-            return True
+            return False
     
     async def add_credits(
         self, 
@@ -671,32 +1107,24 @@ class SupabaseService:
         Returns:
             True if credits were added successfully
         """
-        if not self.is_configured():
+        if not self._configured:
             return True
         
-        credits = await self.get_user_credits(user_id)
-        new_balance = credits.get("balance", 0) + amount
-        
-        self.client.table("credits")\
-            .update({
-                "balance": new_balance,
-                "lifetime_earned": credits.get("lifetime_earned", 0) + amount,
-                "last_purchase_at": datetime.utcnow().isoformat() if reason == "purchase" else None,
-                "updated_at": datetime.utcnow().isoformat()
-            })\
-            .eq("user_id", user_id)\
-            .execute()
+        # Increment and transaction log in one locked transaction (see migrations/018)
+        client = await self.get_async_client()
+        response = await client.rpc(
+            "add_credits",
+            {
+                "p_user_id": user_id,
+                "p_amount": amount,
+                "p_reason": reason
+            }
+        ).execute()
         
-        # Log transaction
-        self.client.table("credit_transactions").insert({
-            "user_id": user_id,
-            "amount": amount,
-            "balance_after": new_balance,
-            "action": reason,
-            "description": f"Added {amount} credits ({reason})"
-        }).execute()
+        await self._cache_delete(f"credits:{user_id}")
         
-        return True
+        result = response.data or {}
+        return bool(result.get("ok"))
     
     # ========================================
     # USAGE LIMITS METHODS
@@ -717,7 +1145,7 @@ class SupabaseService:
         Returns:
             True if updated successfully
         """
-        if not self.is_configured():
+        if not self._configured:
             return True
         
         # Map actions to column names
@@ -736,7 +1164,8 @@ class SupabaseService:
         
         try:
             # Get current usage
-            response = self.client.table("usage_limits")\
+            client = await self.get_async_client()
+            response = await client.table("usage_limits")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .execute()
@@ -746,11 +1175,8 @@ class SupabaseService:
                 new_value = current.get(column, 0) + 1
                 
                 # Update the counter
-                self.client.table("usage_limits")\
-                    .update({
-                        column: new_value,
-                        "updated_at": datetime.utcnow().isoformat()
-                    })\
+                await client.table("usage_limits")\
+                    .update({column: new_value})\
                     .eq("user_id", user_id)\
                     .execute()
                 
@@ -763,7 +1189,7 @@ class SupabaseService:
                     column: 1,
                     "last_reset_date": datetime.utcnow().date().isoformat()
                 }
-                self.client.table("usage_limits").insert(initial_data).execute()
+                await client.table("usage_limits").insert(initial_data).execute()
                 print(f"Created usage_limits record for user {user_id}")
                 return True
                 
@@ -778,11 +1204,12 @@ class SupabaseService:
         details: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Log a usage event."""
-        if not self.is_configured():
+        if not self._configured:
             return True
         
         try:
-            self.client.table("usage_logs").insert({
+            client = await self.get_async_client()
+            await client.table("usage_logs").insert({
                 "user_id": user_id,
                 "action": action,
                 "details": details or {}
@@ -805,7 +1232,7 @@ class SupabaseService:
         deployed_by: Optional[str] = None
     ) -> Dict[str, Any]:
         """Record a Cloudflare deployment."""
-        if not self.is_configured():
+        if not self._configured:
             print("Supabase not configured, skipping deployment save")
             return {"id": None, "subdomain": subdomain, "live_url": live_url}
         
@@ -834,7 +1261,8 @@ class SupabaseService:
             deployment_data["external_id"] = website_id
         
         try:
-            response = self.client.table("deployments").insert(deployment_data).execute()
+            client = await self.get_async_client()
+            response = await client.table("deployments").insert(deployment_data).execute()
             
             if response.data:
                 print(f"Deployment saved: {response.data[0]}")
@@ -848,10 +1276,11 @@ class SupabaseService:
     
     async def get_deployment(self, website_id: str) -> Optional[Dict[str, Any]]:
         """Get the latest deployment for a website."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        response = self.client.table("deployments")\
+        client = await self.get_async_client()
+        response = await client.table("deployments")\
             .select("*")\
             .eq("website_id", website_id)\
             .eq("status", "active")\
@@ -872,11 +1301,12 @@ class SupabaseService:
         Fetch all rate limits from Supabase.
         Returns dict of action -> {limit, window_seconds}
         """
-        if not self.is_configured():
+        if not self._configured:
             return {}
         
         try:
-            response = self.client.table("rate_limits")\
+            client = await self.get_async_client()
+            response = await client.table("rate_limits")\
                 .select("*")\
                 .eq("is_active", True)\
                 .execute()
@@ -900,7 +1330,7 @@ class SupabaseService:
         window_seconds: Optional[int] = None
     ) -> bool:
         """Update a rate limit configuration."""
-        if not self.is_configured():
+        if not self._configured:
             return False
         
         updates = {}
@@ -913,7 +1343,8 @@ class SupabaseService:
             return False
         
         try:
-            self.client.table("rate_limits")\
+            client = await self.get_async_client()
+            await client.table("rate_limits")\
                 .update(updates)\
                 .eq("action", action)\
                 .execute()
@@ -928,10 +1359,11 @@ class SupabaseService:
     
     async def get_website_public(self, website_id: str) -> Optional[Dict[str, Any]]:
         """Get website by ID (public, no owner check)."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        response = self.client.table("websites")\
+        client = await self.get_async_client()
+        response = await client.table("websites")\
             .select("id, status, subdomain, owner_id")\
             .eq("id", website_id)\
             .execute()
@@ -942,11 +1374,12 @@ class SupabaseService:
     
     async def create_lead(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new lead from form submission."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
         try:
-            response = self.client.table("leads").insert(data).execute()
+            client = await self.get_async_client()
+            response = await client.table("leads").insert(data).execute()
             
             if response.data:
                 return response.data[0]
@@ -964,11 +1397,12 @@ class SupabaseService:
         offset: int = 0
     ) -> List[Dict[str, Any]]:
         """Get leads for all websites owned by user."""
-        if not self.is_configured():
+        if not self._configured:
             return []
         
         # Build query with join to get website info
-        query = self.client.table("leads")\
+        client = await self.get_async_client()
+        query = client.table("leads")\
             .select("*, websites!inner(id, subdomain, business_json, owner_id)")\
             .eq("websites.owner_id", owner_id)\
             .order("created_at", desc=True)\
@@ -981,15 +1415,16 @@ class SupabaseService:
         if website_id:
             query = query.eq("website_id", website_id)
         
-        response = query.execute()
+        response = await query.execute()
         return response.data or []
     
     async def get_lead(self, lead_id: str, owner_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific lead (with owner verification via website)."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        response = self.client.table("leads")\
+        client = await self.get_async_client()
+        response = await client.table("leads")\
             .select("*, websites!inner(owner_id)")\
             .eq("id", lead_id)\
             .eq("websites.owner_id", owner_id)\
@@ -1006,7 +1441,7 @@ class SupabaseService:
         status: str
     ) -> bool:
         """Update lead status (with owner verification)."""
-        if not self.is_configured():
+        if not self._configured:
             return False
         
         # First verify ownership
@@ -1014,11 +1449,9 @@ class SupabaseService:
         if not lead:
             return False
         
-        response = self.client.table("leads")\
-            .update({
-                "status": status,
-                "updated_at": datetime.utcnow().isoformat()
-            })\
+        client = await self.get_async_client()
+        response = await client.table("leads")\
+            .update({"status": status})\
             .eq("id", lead_id)\
             .execute()
         
@@ -1026,7 +1459,7 @@ class SupabaseService:
     
     async def delete_lead(self, lead_id: str, owner_id: str) -> bool:
         """Delete a lead (with owner verification)."""
-        if not self.is_configured():
+        if not self._configured:
             return False
         
         # First verify ownership
@@ -1034,7 +1467,8 @@ class SupabaseService:
         if not lead:
             return False
         
-        response = self.client.table("leads")\
+        client = await self.get_async_client()
+        response = await client.table("leads")\
             .delete()\
             .eq("id", lead_id)\
             .execute()
@@ -1043,12 +1477,13 @@ class SupabaseService:
     
     async def get_lead_stats(self, owner_id: str) -> Dict[str, Any]:
         """Get lead statistics for a user's websites."""
-        if not self.is_configured():
+        if not self._configured:
             return {}
         
         try:
             # Use RPC function if available, otherwise compute manually
-            response = self.client.rpc(
+            client = await self.get_async_client()
+            response = await client.rpc(
                 "get_lead_stats",
                 {"p_user_id": owner_id}
             ).execute()
@@ -1085,10 +1520,11 @@ class SupabaseService:
     
     async def get_popup_settings(self, website_id: str) -> Optional[Dict[str, Any]]:
         """Get popup settings for a website."""
-        if not self.is_configured():
+        if not self._configured:
             return None
         
-        response = self.client.table("popup_settings")\
+        client = await self.get_async_client()
+        response = await client.table("popup_settings")\
             .select("*")\
             .eq("website_id", website_id)\
             .execute()
@@ -1103,13 +1539,13 @@ class SupabaseService:
         updates: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Create or update popup settings."""
-        if not self.is_configured():
+        if not self._configured:
             return updates
         
         updates["website_id"] = website_id
-        updates["updated_at"] = datetime.utcnow().isoformat()
         
-        response = self.client.table("popup_settings")\
+        client = await self.get_async_client()
+        response = await client.table("popup_settings")\
             .upsert(updates, on_conflict="website_id")\
             .execute()
         
@@ -1126,21 +1562,22 @@ class SupabaseService:
         Fetch credit costs from the database.
         Falls back to hardcoded CREDIT_COSTS if table doesn't exist.
         """
-        if not self.is_configured():
-            return CREDIT_COSTS
+        if not self._configured:
+            return dict(CREDIT_COSTS)
         
         try:
-            response = self.client.table("credit_costs")\
+            client = await self.get_async_client()
+            response = await client.table("credit_costs")\
                 .select("action, cost")\
                 .eq("is_active", True)\
                 .execute()
             
             if response.data:
                 return {row["action"]: row["cost"] for row in response.data}
-            return CREDIT_COSTS
+            return dict(CREDIT_COSTS)
         except Exception as e:
             print(f"Error fetching credit costs from DB: {e}")
-            return CREDIT_COSTS
+            return dict(CREDIT_COSTS)
     
     async def get_payment_links(self, market: str = "GLOBAL") -> Optional[Dict[str, Any]]:
         """
@@ -1152,11 +1589,12 @@ class SupabaseService:
         Returns:
             Payment link data or None
         """
-        if not self.is_configured():
+        if not self._configured:
             return None
         
         try:
-            response = self.client.table("payment_links")\
+            client = await self.get_async_client()
+            response = await client.table("payment_links")\
                 .select("*")\
                 .eq("market", market.upper())\
                 .eq("is_active", True)\
@@ -1172,11 +1610,12 @@ class SupabaseService:
     
     async def get_all_payment_links(self) -> List[Dict[str, Any]]:
         """Fetch all active payment links."""
-        if not self.is_configured():
+        if not self._configured:
             return []
         
         try:
-            response = self.client.table("payment_links")\
+            client = await self.get_async_client()
+            response = await client.table("payment_links")\
                 .select("*")\
                 .eq("is_active", True)\
                 .execute()
@@ -1193,18 +1632,16 @@ class SupabaseService:
         amount: Optional[float] = None
     ) -> bool:
         """Update a payment link URL (admin function)."""
-        if not self.is_configured():
+        if not self._configured:
             return False
         
         try:
-            updates = {
-                "payment_url": payment_url,
-                "updated_at": datetime.utcnow().isoformat()
-            }
+            updates = {"payment_url": payment_url}
             if amount is not None:
                 updates["amount"] = amount
             
-            self.client.table("payment_links")\
+            client = await self.get_async_client()
+            await client.table("payment_links")\
                 .update(updates)\
                 .eq("market", market.upper())\
                 .execute()
@@ -1214,6 +1651,15 @@ class SupabaseService:
             return False
 
 
-# Global instance
-supabase_service = SupabaseService()
+@lru_cache(maxsize=1)
+def get_supabase_service() -> SupabaseService:
+    """Get the shared Supabase service, constructed on first use rather than at import."""
+    return SupabaseService()
+
+
+def __getattr__(name: str):
+    # Backward compatibility: `supabase_service` resolves to the lazy singleton
+    if name == "supabase_service":
+        return get_supabase_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -3,6 +3,7 @@ Celery Background Tasks
 All AI-heavy and long-running tasks run here, not in FastAPI.
 """
 
+import io
 import os
 import json
 from datetime import datetime
@@ -14,7 +15,7 @@ from app.core.celery_app import celery_app
 from app.ai import (
     parse_business_description,
     select_layout,
-    transcribe_audio,
+    transcribe_audio_sync as transcribe_audio,
     normalize_text,
     extract_business_info,
     create_business_profile_from_extraction,
@@ -123,11 +124,11 @@ def generate_website_task(
         
         # In production mode with user_id, save to Supabase
         if settings.is_production and user_id:
-            from app.services.supabase import supabase_service
+            from app.services.supabase import get_supabase_service
             
             async def save_to_supabase():
                 print(f"Saving website to Supabase for user {user_id}")
-                return await supabase_service.create_website(
+                return await get_supabase_service().create_website(
                     owner_id=user_id,
                     data={
                         "status": "draft",
@@ -209,7 +210,7 @@ def speech_to_text_task(self, audio_data_b64: str, filename: str, language: str
         audio_data = base64.b64decode(audio_data_b64)
         
         # Transcribe
-        result = transcribe_audio(audio_data, filename, language, api_key)
+        result = transcribe_audio(io.BytesIO(audio_data), filename, language, api_key)
         
         # Normalize
         self.update_state(state="PROGRESS", meta={
@@ -264,7 +265,7 @@ def voice_to_website_task(self, audio_data_b64: str, filename: str, language: st
         })
         
         audio_data = base64.b64decode(audio_data_b64)
-        transcription = transcribe_audio(audio_data, filename, language, api_key)
+        transcription = transcribe_audio(io.BytesIO(audio_data), filename, language, api_key)
         
         # Step 2: Normalize
         self.update_state(state="PROGRESS", meta={
@@ -0,0 +1,32 @@
+-- ================================================
+-- Migration 009: Atomic usage counter increments
+-- Replaces the SELECT-then-UPDATE in UsageTracker.increment_usage
+-- with a single UPDATE ... SET col = col + 1 (no lost increments)
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+CREATE OR REPLACE FUNCTION increment_usage(
+  p_user_id UUID,
+  p_usage_type TEXT
+)
+RETURNS SETOF public.usage_limits
+LANGUAGE SQL
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+  -- Static column list (no dynamic SQL): each flag adds 0 or 1
+  UPDATE public.usage_limits
+  SET daily_generates       = daily_generates       + (p_usage_type = 'generate')::INT,
+      daily_voice_generates = daily_voice_generates + (p_usage_type = 'voice_generate')::INT,
+      daily_edits           = daily_edits           + (p_usage_type = 'edit')::INT,
+      daily_redesigns       = daily_redesigns       + (p_usage_type = 'redesign')::INT,
+      published_sites       = published_sites       + (p_usage_type = 'publish')::INT,
+      monthly_generates     = monthly_generates     + (p_usage_type IN ('generate', 'voice_generate'))::INT,
+      updated_at            = NOW()
+  WHERE user_id = p_user_id
+  RETURNING *;
+$$;
+
+GRANT EXECUTE ON FUNCTION increment_usage(UUID, TEXT) TO service_role;
+
+COMMENT ON FUNCTION increment_usage IS 'Atomically increment a usage counter (and monthly generates) for a user';
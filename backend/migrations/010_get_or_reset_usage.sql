@@ -0,0 +1,57 @@
+-- ================================================
+-- Migration 010: Single round-trip usage lookup
+-- Returns a user's usage_limits row, resetting daily counters when
+-- last_reset_date is stale and creating the row if it's missing.
+-- Replaces SELECT (+ UPDATE / INSERT) in UsageTracker.get_or_create_usage
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+CREATE OR REPLACE FUNCTION get_or_reset_usage(
+  p_user_id UUID,
+  p_today DATE
+)
+RETURNS SETOF public.usage_limits
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+BEGIN
+  -- 1. Stale row: reset daily counters (row lock makes concurrent resets safe)
+  RETURN QUERY
+  UPDATE public.usage_limits
+  SET daily_generates = 0,
+      daily_voice_generates = 0,
+      daily_edits = 0,
+      daily_redesigns = 0,
+      last_reset_date = p_today,
+      updated_at = NOW()
+  WHERE user_id = p_user_id
+    AND last_reset_date IS DISTINCT FROM p_today
+  RETURNING *;
+  IF FOUND THEN
+    RETURN;
+  END IF;
+  
+  -- 2. Current row: plain read (no write on the common path)
+  RETURN QUERY
+  SELECT * FROM public.usage_limits WHERE user_id = p_user_id;
+  IF FOUND THEN
+    RETURN;
+  END IF;
+  
+  -- 3. No row yet: create it (another request may have just done so)
+  RETURN QUERY
+  INSERT INTO public.usage_limits (user_id, last_reset_date)
+  VALUES (p_user_id, p_today)
+  ON CONFLICT (user_id) DO NOTHING
+  RETURNING *;
+  IF NOT FOUND THEN
+    RETURN QUERY
+    SELECT * FROM public.usage_limits WHERE user_id = p_user_id;
+  END IF;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_or_reset_usage(UUID, DATE) TO service_role;
+
+COMMENT ON FUNCTION get_or_reset_usage IS 'Get usage row for a user, resetting stale daily counters or creating it, in one call';
@@ -0,0 +1,44 @@
+-- ================================================
+-- Migration 011: Atomic website version creation
+-- Computes the next version number and inserts the row in one call.
+-- Replaces get_website_versions(limit=1) + INSERT in
+-- SupabaseService.create_website_version (two round-trips, and two
+-- concurrent callers could pick the same version number)
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+CREATE OR REPLACE FUNCTION create_website_version(
+  p_website_id UUID,
+  p_html TEXT,
+  p_business_json JSONB DEFAULT NULL,
+  p_layout_json JSONB DEFAULT NULL,
+  p_created_by UUID DEFAULT NULL
+)
+RETURNS SETOF public.website_versions
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+BEGIN
+  -- Serialize version numbering per website on the parent row lock
+  PERFORM 1 FROM public.websites WHERE id = p_website_id FOR UPDATE;
+
+  RETURN QUERY
+  INSERT INTO public.website_versions (
+    website_id, version, html, business_json, layout_json, created_by
+  )
+  SELECT p_website_id,
+         COALESCE(MAX(v.version), 0) + 1,
+         p_html,
+         p_business_json,
+         p_layout_json,
+         p_created_by
+  FROM public.website_versions v
+  WHERE v.website_id = p_website_id
+  RETURNING *;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION create_website_version(UUID, TEXT, JSONB, JSONB, UUID) TO service_role;
+
+COMMENT ON FUNCTION create_website_version IS 'Insert the next numbered version of a website in a single atomic call';
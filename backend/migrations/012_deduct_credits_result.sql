@@ -0,0 +1,55 @@
+-- ================================================
+-- Migration 012: deduct_credits returns the outcome and new balance
+-- Check + deduct + transaction log stay in one locked transaction;
+-- callers branch on "ok" instead of checking the balance first, and
+-- SupabaseService no longer has a Python-side (racy) fallback path
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+-- Return type changes from BOOLEAN to JSONB, so the old signature must go
+DROP FUNCTION IF EXISTS deduct_credits(UUID, INT, TEXT, TEXT);
+
+CREATE FUNCTION deduct_credits(
+  p_user_id UUID,
+  p_amount INT,
+  p_action TEXT,
+  p_description TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+DECLARE
+  v_current_balance INT;
+  v_new_balance INT;
+BEGIN
+  -- Lock the balance row for the rest of the transaction
+  SELECT balance INTO v_current_balance
+  FROM public.credits
+  WHERE user_id = p_user_id
+  FOR UPDATE;
+  
+  -- Check if enough credits
+  IF v_current_balance IS NULL OR v_current_balance < p_amount THEN
+    RETURN jsonb_build_object('ok', false, 'new_balance', COALESCE(v_current_balance, 0));
+  END IF;
+  
+  v_new_balance := v_current_balance - p_amount;
+  
+  UPDATE public.credits
+  SET balance = v_new_balance,
+      lifetime_spent = lifetime_spent + p_amount,
+      updated_at = NOW()
+  WHERE user_id = p_user_id;
+  
+  INSERT INTO public.credit_transactions (user_id, amount, balance_after, action, description)
+  VALUES (p_user_id, -p_amount, v_new_balance, p_action, p_description);
+  
+  RETURN jsonb_build_object('ok', true, 'new_balance', v_new_balance);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION deduct_credits(UUID, INT, TEXT, TEXT) TO service_role;
+
+COMMENT ON FUNCTION deduct_credits IS 'Atomically check and deduct credits with transaction logging; returns {ok, new_balance}';
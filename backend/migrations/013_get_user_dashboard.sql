@@ -0,0 +1,60 @@
+-- ================================================
+-- Migration 013: Dashboard listing in one query
+-- Returns a user's websites (without the html/layout payloads) joined with
+-- their latest active deployment and latest version number, replacing
+-- get_user_websites + per-website get_deployment / get_website_versions
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+CREATE OR REPLACE FUNCTION get_user_dashboard(
+  p_owner_id UUID,
+  p_status TEXT DEFAULT NULL,
+  p_limit INT DEFAULT 50
+)
+RETURNS TABLE (
+  id UUID,
+  status TEXT,
+  subdomain TEXT,
+  live_url TEXT,
+  business_json JSONB,
+  language TEXT,
+  source_type TEXT,
+  published_at TIMESTAMPTZ,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  deployment_id TEXT,
+  deployment_live_url TEXT,
+  latest_version INT
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+  SELECT w.id, w.status, w.subdomain, w.live_url, w.business_json,
+         w.language, w.source_type, w.published_at, w.created_at, w.updated_at,
+         d.deployment_id, d.live_url, v.version
+  FROM public.websites w
+  LEFT JOIN LATERAL (
+    SELECT dep.deployment_id, dep.live_url
+    FROM public.deployments dep
+    WHERE dep.website_id = w.id AND dep.status = 'active'
+    ORDER BY dep.created_at DESC
+    LIMIT 1
+  ) d ON true
+  LEFT JOIN LATERAL (
+    SELECT ver.version
+    FROM public.website_versions ver
+    WHERE ver.website_id = w.id
+    ORDER BY ver.version DESC
+    LIMIT 1
+  ) v ON true
+  WHERE w.owner_id = p_owner_id
+    AND (p_status IS NULL OR w.status = p_status)
+  ORDER BY w.created_at DESC
+  LIMIT p_limit;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_user_dashboard(UUID, TEXT, INT) TO service_role;
+
+COMMENT ON FUNCTION get_user_dashboard IS 'List a user''s websites with latest deployment and version in a single query';
@@ -0,0 +1,40 @@
+-- ================================================
+-- Migration 014: Database-side updated_at
+-- One BEFORE UPDATE trigger function stamps updated_at on every table the
+-- API writes, so the backend no longer sends a Python timestamp with each
+-- UPDATE (smaller payloads, one clock for all API instances)
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$;
+
+DO $$
+DECLARE
+  t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY[
+    'users', 'websites', 'credits', 'usage_limits',
+    'leads', 'popup_settings', 'payment_links'
+  ]
+  LOOP
+    EXECUTE format('ALTER TABLE public.%I ALTER COLUMN updated_at SET DEFAULT NOW()', t);
+    EXECUTE format('DROP TRIGGER IF EXISTS trigger_%s_updated_at ON public.%I', t, t);
+    EXECUTE format(
+      'CREATE TRIGGER trigger_%s_updated_at BEFORE UPDATE ON public.%I '
+      'FOR EACH ROW EXECUTE FUNCTION set_updated_at()',
+      t, t
+    );
+  END LOOP;
+END;
+$$;
+
+COMMENT ON FUNCTION set_updated_at IS 'BEFORE UPDATE trigger: set updated_at to NOW()';
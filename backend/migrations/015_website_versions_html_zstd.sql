@@ -0,0 +1,54 @@
+-- ================================================
+-- Migration 015: zstd-compressed version snapshots
+-- Every edit stores a full HTML snapshot in website_versions. New
+-- snapshots are stored zstd-compressed in html_zstd (BYTEA) and html is
+-- left NULL; the backend compresses on write and decompresses on read.
+-- Rows written before this migration keep their plain html.
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+ALTER TABLE public.website_versions ADD COLUMN IF NOT EXISTS html_zstd BYTEA;
+ALTER TABLE public.website_versions ALTER COLUMN html DROP NOT NULL;
+
+ALTER TABLE public.website_versions
+  ADD CONSTRAINT website_versions_html_present
+  CHECK (html IS NOT NULL OR html_zstd IS NOT NULL);
+
+-- Signature changes from p_html TEXT to p_html_zstd BYTEA
+DROP FUNCTION IF EXISTS create_website_version(UUID, TEXT, JSONB, JSONB, UUID);
+
+CREATE OR REPLACE FUNCTION create_website_version(
+  p_website_id UUID,
+  p_html_zstd BYTEA,
+  p_business_json JSONB DEFAULT NULL,
+  p_layout_json JSONB DEFAULT NULL,
+  p_created_by UUID DEFAULT NULL
+)
+RETURNS SETOF public.website_versions
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+BEGIN
+  -- Serialize version numbering per website on the parent row lock
+  PERFORM 1 FROM public.websites WHERE id = p_website_id FOR UPDATE;
+
+  RETURN QUERY
+  INSERT INTO public.website_versions (
+    website_id, version, html_zstd, business_json, layout_json, created_by
+  )
+  SELECT p_website_id,
+         COALESCE(MAX(v.version), 0) + 1,
+         p_html_zstd,
+         p_business_json,
+         p_layout_json,
+         p_created_by
+  FROM public.website_versions v
+  WHERE v.website_id = p_website_id
+  RETURNING *;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION create_website_version(UUID, BYTEA, JSONB, JSONB, UUID) TO service_role;
+
+COMMENT ON FUNCTION create_website_version IS 'Insert the next numbered version of a website (zstd-compressed HTML) in a single atomic call';
@@ -0,0 +1,27 @@
+-- ================================================
+-- Migration 016: Indexes matching the backend's query shapes
+-- websites list:   WHERE owner_id = ? ORDER BY created_at DESC
+-- get_deployment:  WHERE website_id = ? AND status = 'active' ORDER BY created_at DESC
+-- Already covered elsewhere, so not repeated here:
+--   website_versions(website_id, version) - UNIQUE constraint
+--   users(auth_id), credits(user_id)      - UNIQUE constraints
+--   waitlist(contact)                     - UNIQUE constraint
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+-- Dashboard/list columns ride along in the index (index-only scans);
+-- supersedes the single-column owner_id index
+CREATE INDEX IF NOT EXISTS idx_websites_owner_created
+  ON public.websites(owner_id, created_at DESC)
+  INCLUDE (status, subdomain, live_url);
+DROP INDEX IF EXISTS idx_websites_owner_id;
+
+CREATE INDEX IF NOT EXISTS idx_deployments_wid_status_created
+  ON public.deployments(website_id, status, created_at DESC);
+
+-- Duplicates the UNIQUE(contact) constraint's own index; every signup
+-- INSERT was maintaining both
+DROP INDEX IF EXISTS idx_waitlist_contact;
+
+ANALYZE public.websites;
+ANALYZE public.deployments;
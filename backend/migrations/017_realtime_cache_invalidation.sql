@@ -0,0 +1,32 @@
+-- ================================================
+-- Migration 017: Realtime feed for backend cache invalidation
+-- The backend caches websites, credits and users rows in Redis and evicts
+-- them when Supabase Realtime reports a change (SupabaseService.
+-- start_cache_invalidator). Realtime only streams tables that are in the
+-- supabase_realtime publication, and DELETE/UPDATE events only carry the
+-- full old row (needed for credits.user_id and users.auth_id keys) with
+-- REPLICA IDENTITY FULL.
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+ALTER TABLE public.websites REPLICA IDENTITY FULL;
+ALTER TABLE public.credits REPLICA IDENTITY FULL;
+ALTER TABLE public.users REPLICA IDENTITY FULL;
+
+DO $$
+DECLARE
+  t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['websites', 'credits', 'users']
+  LOOP
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime'
+        AND schemaname = 'public'
+        AND tablename = t
+    ) THEN
+      EXECUTE format('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', t);
+    END IF;
+  END LOOP;
+END;
+$$;
@@ -0,0 +1,44 @@
+-- ================================================
+-- Migration 018: Atomic credit top-up
+-- Balance increment + transaction log in one locked transaction, the
+-- counterpart of deduct_credits (migrations/012). Replaces the Python
+-- read-modify-write in SupabaseService.add_credits, which raced with
+-- concurrent deductions and could log a transaction whose balance
+-- update had failed
+-- Run this in your Supabase SQL Editor
+-- ================================================
+
+CREATE OR REPLACE FUNCTION add_credits(
+  p_user_id UUID,
+  p_amount INT,
+  p_reason TEXT DEFAULT 'purchase'
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public  -- Prevent search_path hijacking
+AS $$
+DECLARE
+  v_new_balance INT;
+BEGIN
+  UPDATE public.credits
+  SET balance = balance + p_amount,
+      lifetime_earned = lifetime_earned + p_amount,
+      last_purchase_at = CASE WHEN p_reason = 'purchase' THEN NOW() ELSE last_purchase_at END
+  WHERE user_id = p_user_id
+  RETURNING balance INTO v_new_balance;
+
+  IF v_new_balance IS NULL THEN
+    RETURN jsonb_build_object('ok', false, 'new_balance', 0);
+  END IF;
+
+  INSERT INTO public.credit_transactions (user_id, amount, balance_after, action, description)
+  VALUES (p_user_id, p_amount, v_new_balance, p_reason, format('Added %s credits (%s)', p_amount, p_reason));
+
+  RETURN jsonb_build_object('ok', true, 'new_balance', v_new_balance);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION add_credits(UUID, INT, TEXT) TO service_role;
+
+COMMENT ON FUNCTION add_credits IS 'Atomically add credits with transaction logging; returns {ok, new_balance}';